@@ -1,3 +1,6 @@
 from simple import *
 from iftag import *
 from fortag import *
+from batch import *
+from memory import *
+from fork import *
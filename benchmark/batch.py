@@ -0,0 +1,32 @@
+import timeit
+from helpers import print_time
+
+template = '''"""<!DOCTYPE html>
+<html>
+<body>
+    <p>Dear {{ user.name|capfirst }},</p>
+    <ul>
+    {% for item in items %}
+        <li>{{ item }}</li>
+    {% endfor %}
+    </ul>
+</body>
+</html>"""'''
+print('\n%s\n' % template)
+
+setup = ("from lighty.templates import Template; template = Template();" +
+         "template.parse(%s); " % template +
+         "contexts = [{'user': {'name': 'user%d' % i}, " +
+         "'items': list(range(i % 10))} for i in range(10000)]")
+
+print_time('execute loop', timeit.repeat(
+           "for context in contexts: template.execute(context)",
+           setup, repeat=5, number=1))
+
+print_time('render_many', timeit.repeat(
+           "for result in template.render_many(contexts): pass",
+           setup, repeat=5, number=1))
+
+print_time('render_many, 4 processes', timeit.repeat(
+           "for result in template.render_many(contexts, processes=4, " +
+           "chunk_size=256): pass", setup, repeat=5, number=1))
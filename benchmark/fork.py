@@ -0,0 +1,85 @@
+"""Benchmark measures private memory (USS) of worker processes forked after
+templates were loaded by master process, with and without loader freeze
+"""
+import gc
+import os
+
+from lighty.templates.template import LazyTemplate
+from lighty.templates.loaders import TemplateLoader
+
+base = '''<!DOCTYPE html>
+<html>
+<head>
+    <title>{% block title %}{% endblock %}</title>
+</head>
+<body>
+    {% block content %}{% endblock %}
+</body>
+</html>'''
+item = '''<div class="item">
+    <h2>{{ item.title|capfirst }}</h2>
+    {% if item.visible %}<p class="text">{{ item.text }}</p>{% endif %}
+    <ul>{% for tag in item.tags %}<li>{{ tag }}</li>{% endfor %}</ul>
+</div>
+'''
+page = ('{% extend "base.html" %}{% block title %}Page {{ n }}' +
+        '{% endblock %}{% block content %}' + item * 10 + '{% endblock %}')
+context = {'n': 1, 'item': {'title': 'title', 'visible': True,
+                            'text': 'text', 'tags': ['a', 'b', 'c']}}
+number = 300
+workers = 4
+
+
+def private_memory():
+    '''Get the size of memory pages used by current process only
+    '''
+    path = '/proc/self/smaps_rollup'
+    if not os.path.exists(path):
+        path = '/proc/self/smaps'
+    size = 0
+    with open(path) as smaps:
+        for line in smaps:
+            if line.startswith('Private_'):
+                size += int(line.split()[1]) * 1024
+    return size
+
+
+def measure(freeze):
+    '''Load templates, fork workers rendering all of them and get the
+    average private memory of worker
+    '''
+    loader = TemplateLoader()
+    LazyTemplate(base, loader=loader, name='base.html')
+    for i in range(number):
+        LazyTemplate(page, loader=loader, name='page%d.html' % i).prepare()
+    if freeze:
+        loader.freeze()
+    else:
+        gc.collect()
+    pids = []
+    read_end, write_end = os.pipe()
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_end)
+            for i in range(number):
+                loader.get_template('page%d.html' % i)(context)
+            gc.collect()
+            os.write(write_end, ('%d\n' % private_memory()).encode())
+            os._exit(0)
+        pids.append(pid)
+    os.close(write_end)
+    with os.fdopen(read_end) as results:
+        sizes = [int(line) for line in results]
+    for pid in pids:
+        os.waitpid(pid, 0)
+    if hasattr(gc, 'unfreeze'):
+        gc.unfreeze()
+    return sum(sizes) / len(sizes)
+
+
+if hasattr(os, 'fork') and os.path.exists('/proc/self/smaps'):
+    print('\n%d templates rendered in %d forked workers' % (number, workers))
+    print('  %d bytes of private memory per worker' % measure(False))
+    print('  %d bytes of private memory per worker after loader.freeze()\n' %
+          measure(True))
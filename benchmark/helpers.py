@@ -1,5 +1,5 @@
 def print_time(name, results):
-    print '\n%s:' % name
+    print('\n%s:' % name)
     for exec_time in results:
-        print '   ', exec_time
-    print ' ', sum(results) / len(results), '\n'
+        print('    %s' % exec_time)
+    print('  %s\n' % (sum(results) / len(results)))
@@ -0,0 +1,38 @@
+import gc
+import tracemalloc
+
+from lighty.templates.template import LazyTemplate
+from lighty.templates.loaders import TemplateLoader
+
+base = '''<!DOCTYPE html>
+<html>
+<head>
+    <title>{% block title %}{% endblock %}</title>
+</head>
+<body>
+    {% block content %}{% endblock %}
+</body>
+</html>'''
+item = '''<div class="item">
+    <h2>{{ item.title|capfirst }}</h2>
+    {% if item.visible %}<p class="text">{{ item.text }}</p>{% endif %}
+    <ul>{% for tag in item.tags %}<li>{{ tag }}</li>{% endfor %}</ul>
+</div>
+'''
+page = ('{% extend "base.html" %}{% block title %}Page {{ n }}' +
+        '{% endblock %}{% block content %}' + item * 10 + '{% endblock %}')
+number = 300
+
+gc.collect()
+tracemalloc.start()
+before = tracemalloc.get_traced_memory()[0]
+loader = TemplateLoader()
+LazyTemplate(base, loader=loader, name='base.html')
+for i in range(number):
+    LazyTemplate(page, loader=loader, name='page%d.html' % i).prepare()
+gc.collect()
+used = tracemalloc.get_traced_memory()[0] - before
+tracemalloc.stop()
+
+print('\n%d templates, %d bytes of source each' % (number, len(page)))
+print('  %d bytes per loaded template\n' % (used / number))
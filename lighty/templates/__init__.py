@@ -67,9 +67,15 @@ exception. Lighty-template is strict template engine requires to be carefull
 with your templates and variables in context for rendering. I think that
 usually strict means better and safe.
 """
+from array import array
+import bisect
 from collections import deque
 import functools
 from decimal import Decimal
+import hashlib
+import re
+import threading
+import weakref
 try:
     import cStringIO
     StringIO = cStringIO.StringIO
@@ -81,10 +87,54 @@ except:
         import io
         StringIO = io.StringIO
 
-from .context import resolve
+from .cache import encode_key, LRUCache
+from .context import resolve, resolve_key
 from .loaders import TemplateLoader
 from .filter import filter_manager
-from .tag import tag_manager, parse_token
+from .formatter import formatter_manager
+from .limits import extra_size, LIMITS_KEY
+from .metrics import stats, timer
+from .replay import recorder
+from .tag import tag_manager, parse_token, VARIABLE
+
+# Text commands are shared by all the templates contain the same text
+text_commands = weakref.WeakValueDictionary()
+text_nodes = weakref.WeakKeyDictionary()
+text_lock = threading.Lock()
+# Template tokens found on searching the end of block body
+block_tokens = re.compile(r'\{\{[^}]*\}|\{%([^%]*)%\}')
+
+
+class TemplateSyntaxError(LookupError):
+    '''Error in template source. Contains the name of template and position
+    of error. It's a LookupError like the errors for unregistered tags
+    raised before positions were tracked
+    '''
+
+    def __init__(self, message, name, line, column):
+        super(TemplateSyntaxError, self).__init__(
+                '%s in %s, line %d, column %d' % (message, name, line, column))
+        self.name = name
+        self.line = line
+        self.column = column
+
+
+def walk_include(loader, name, stack, walk, recursive=None):
+    '''Call walk with the template included by constant name. stack is the
+    list of names of the templates being walked, name is pushed on it for
+    the call. Returns recursive without calling walk if template is in the
+    stack already
+    '''
+    if name in stack:
+        return recursive
+    template = loader.get_template(name)
+    if hasattr(template, 'prepare'):
+        template.prepare()
+    stack.append(name)
+    try:
+        return walk(template)
+    finally:
+        stack.pop()
 
 
 class Template(object):
@@ -119,7 +169,22 @@ class Template(object):
         >>> template({'user': {'name': 'Peter', 'is_authenticated': True},
         ...           'var': 'test'})
         'Hello, Peter from test'
+
+    Parsed template is not changed on execution and tags get the copy of
+    context when they set variables, so the same template and even the same
+    context can be used from many threads at once. Template created with
+    lazy_blocks is the exception: first execution of each block body
+    compiles it and updates template's commands table, variables and tags,
+    so it's not immutable until :func:`freeze`. Bodies of one template are
+    compiled under one lock and :func:`dependencies` compiles them all
+    first.
     """
+    __slots__ = ('loader', 'name', 'origin', 'autoescape', 'commands',
+                 'context', 'variables', 'filters', 'tags', 'nodes', 'lines',
+                 'memo', 'memo_keys', 'encoded', 'parent', 'blocks',
+                 'lazy_blocks', 'spans', 'block_lock', 'digest',
+                 'fingerprint_keys', 'loop_fields', 'block_name',
+                 'formatters', '__weakref__')
     TEXT = 1
     TOKEN = 2
     ECHO = 3
@@ -128,15 +193,49 @@ class Template(object):
     STRING = 6
     CLOSE = 7
 
-    def __init__(self, text=None, loader=TemplateLoader(), name="unnamed"):
-        """Create new template instance
+    def __init__(self, text=None, loader=TemplateLoader(), name="unnamed",
+                 autoescape=False, register=True, lazy_blocks=False,
+                 formatters=None):
+        """Create new template instance. Template created with autoescape
+        escapes HTML special characters in all the variables and filters
+        results printed except the values marked as safe with "safe" filter
+        or :class:`lighty.templates.safestring.SafeString`. Template is
+        registered in loader unless register is False. Template created with
+        lazy_blocks keeps the source of block tags bodies and compiles each
+        body on first execution. Values printed are converted into strings
+        with formatters, :data:`lighty.templates.formatter.formatter_manager`
+        by default.
         """
         super(Template, self).__init__()
         self.loader = loader
         self.name = name
+        self.origin = name
+        self.autoescape = autoescape
         self.commands = []
         self.context = {}
-        self.loader.register(name, self)
+        self.variables = set()
+        self.filters = set()
+        self.tags = []
+        self.nodes = {}
+        self.lines = array('l')
+        self.memo = None
+        self.memo_keys = ()
+        self.encoded = {}
+        self.lazy_blocks = lazy_blocks
+        self.spans = []
+        # Lock used by block bodies compiled on first use
+        self.block_lock = threading.RLock() if lazy_blocks else None
+        self.digest = None
+        self.fingerprint_keys = None
+        # Trees of loop variable fields by id of "for" tag block
+        self.loop_fields = {}
+        # Name of block for the templates "block" tag creates
+        self.block_name = None
+        if formatters is None:
+            formatters = formatter_manager
+        self.formatters = formatters
+        if register:
+            self.loader.register(name, self)
         if text is not None:
             self.parse(text)
 
@@ -144,13 +243,30 @@ class Template(object):
         return type(self) == type(obj) and self.name == obj.name
 
     @staticmethod
-    def variable(name):
+    def variable(name, autoescape=False, formatters=formatter_manager):
         '''Returns a function that resolve variable and ruturns it's value
+        converted into string with formatters
         '''
+        if autoescape:
+            to_escaped = formatters.escape
+
+            def print_escaped(context):
+                '''Resolve variable and returns it's escaped value
+                '''
+                return to_escaped(resolve(name, context))
+            return print_escaped
+
+        formatter = formatters.cache.get
+        lookup = formatters.lookup
+
         def print_variable(context):
             '''Resolve variable and returns it's value
             '''
-            return str(resolve(name, context))
+            value = resolve(name, context)
+            if value.__class__ is str:
+                return value
+            return (formatter(value.__class__) or
+                    lookup(value.__class__))(value)
         return print_variable
 
     @staticmethod
@@ -164,25 +280,48 @@ class Template(object):
         return print_constant
 
     @staticmethod
-    def filter(value):
-        '''Parse the tamplte filter
+    def parse_filter(value):
+        '''Parse the template filter into variable name and list of filters
+        with arguments
         '''
         parts = value.split('|')
         filters = []
         variable = parts[0]
         for token in parts[1:]:
             if ':' in token:
-                parsed = token.split(':')
-                if len(parsed) > 1:
-                    filter_name, args_token = parsed
-                    args, types = parse_token(args_token)
-                else:
-                    filter_name = parsed
-                    args, types = (), ()
+                filter_name, args_token = token.split(':', 1)
+                args, types = parse_token(args_token)
             else:
                 filter_name = token
                 args, types = (), ()
             filters.append((filter_name, args, types))
+        return variable, filters
+
+    @staticmethod
+    def filter_value(variable):
+        '''Get the constant filters applied to. Returns pair of flag is
+        variable a constant and the value of constant
+        '''
+        if variable[0] == '"' or variable[0] == "'":
+            if variable[0] == variable[-1]:
+                return True, variable[1:-1]
+            else:
+                raise ValueError('Template filter syntax error')
+        try:
+            return True, Decimal(variable)
+        except (ArithmeticError, ValueError):
+            return False, None
+
+    @staticmethod
+    def filter(value, autoescape=False, formatters=formatter_manager):
+        '''Parse the tamplte filter
+        '''
+        variable, filters = Template.parse_filter(value)
+        is_constant, constant = Template.filter_value(variable)
+        if autoescape:
+            to_string = formatters.escape
+        else:
+            to_string = formatters.format
 
         def apply_filters(context):
             '''Apply filters accoring to values from context
@@ -193,17 +332,11 @@ class Template(object):
                 filter_name, args, types = pair
                 return filter_manager.apply(filter_name, value, args, types,
                                             context)
-            if variable[0] == '"' or variable[0] == "'":
-                if variable[0] == variable[-1]:
-                    value = variable[1:-1]
-                else:
-                    raise ValueError('Template filter syntax error')
+            if is_constant:
+                value = constant
             else:
-                try:
-                    value = Decimal(variable)
-                except ValueError:
-                    value = resolve(variable, context)
-            return str(functools.reduce(apply_filter, filters, value))
+                value = resolve(variable, context)
+            return to_string(functools.reduce(apply_filter, filters, value))
         return apply_filters
 
     def tag(self, name, token, block):
@@ -222,27 +355,57 @@ class Template(object):
             if callable(result):
                 return result
             else:
-                return lambda context: ''
+                return self.text_command('')
 
     def parse(self, text):
         """Parse template string and create appropriate command list into this
         template instance
         """
+        if self.lazy_blocks:
+            # Lazy blocks keep the source to compile it later
+            text = ''.join(text)
+        self.commands = self.compile(text, self.commands, lines=self.lines)
+
+    def compile(self, source, cmds, start=0, end=None, scope_stack=None,
+                lines=None):
+        """Compile the part of template source from start to end offsets
+        appending commands to cmds list. Returns the list of commands
+        """
         current = Template.TEXT
         token = ''
-        cmds = self.commands
         cmd_stack = deque()
         tag_stack = deque()
         token_stack = deque()
+        if scope_stack is None:
+            scope_stack = deque()
+        offset_stack = deque()
+        # Table used to store the same token strings once
+        strings = {}
+        if start > 0 or end is not None:
+            text = source[start:end]
+        else:
+            text = source
+        offset = start - 1
+        skip = -1
+        text_start = start
+        tag_start = 0
         for char in text:
+            offset += 1
+            if char == '\n' and lines is not None:
+                lines.append(offset + 1)
+            if offset < skip:
+                continue
             if current == Template.TEXT:
                 if char == '{':
                     current = Template.TOKEN
+                    tag_start = offset
                     if len(token) > 0:
-                        cmds.append(Template.constant(token))
+                        cmds.append(self.text_command(token, text_start))
                         token = ''
                 else:
-                    token += str(char)
+                    if len(token) == 0:
+                        text_start = offset
+                    token += char
             elif current == Template.TOKEN:
                 if char == '{':
                     current = Template.ECHO
@@ -250,23 +413,29 @@ class Template(object):
                     current = Template.TAG
                 else:
                     current = Template.TEXT
-                    token = '{' + str(char)
+                    text_start = tag_start
+                    token = '{' + char
             elif current == Template.ECHO or current == Template.FILTER:
                 if char == '}':
                     if len(token) > 0:
                         token = token.strip()
+                        token = strings.setdefault(token, token)
                         if current == Template.ECHO:
-                            cmd = Template.variable(token)
+                            self.record_variable(token, scope_stack)
+                            cmd = Template.variable(token, self.autoescape,
+                                                    self.formatters)
+                            self.nodes[cmd] = (current, token, tag_start)
                         else:
-                            cmd = Template.filter(token)
+                            self.record_filter(token, scope_stack)
+                            cmd = self.filter_command(token, tag_start)
                         cmds.append(cmd)
                         token = ''
                     current = Template.CLOSE
                 elif char == '|':
                     current = Template.FILTER
-                    token += str(char)
+                    token += char
                 else:
-                    token += str(char)
+                    token += char
             elif current == Template.TAG:
                 if char == '%':
                     current = Template.CLOSE
@@ -274,96 +443,1098 @@ class Template(object):
                     name = token.split(' ', 1)[0]
                     if name.startswith('end'):
                         name = name[3:]
+                        if len(tag_stack) == 0:
+                            raise self.syntax_error(
+                                    "Unexpected closing tag: 'end%s'" % name,
+                                    tag_start)
                         tag = tag_stack.pop()
                         # Close block
                         if name == tag:
                             block = cmds
                             cmds = cmd_stack.pop()
                             token = token_stack.pop()
-                            cmds.append(self.tag(name, token, block))
+                            scope_stack.pop()
+                            self.record_tag(name, token, scope_stack)
+                            cmds.append(self.tag_command(
+                                    name, token, block, offset_stack.pop()))
                         else:
-                            raise Exception(
+                            raise self.syntax_error(
                                 "Invalid closing tag: 'end%s' except 'end%s'" %
-                                (name, tag))
+                                (name, tag), tag_start)
                     else:
                         if ' ' in token:
                             token = token.split(' ', 1)[1]
                         else:
                             token = ''
-                        if tag_manager.is_block_tag(name):
+                        name = strings.setdefault(name, name)
+                        token = strings.setdefault(token, token)
+                        try:
+                            is_block_tag = tag_manager.is_block_tag(name)
+                        except LookupError as error:
+                            raise self.syntax_error(str(error), tag_start)
+                        span = None
+                        if is_block_tag and self.lazy_blocks:
+                            span = self.block_span(source, offset + 1, name)
+                        if span is not None:
+                            # Skip block body and compile it on first use
+                            scope = list(scope_stack)
+                            scope.append(
+                                    tag_manager.dependencies(name, token)[1])
+                            block = LazyBlock(self, source, offset + 2,
+                                              span[0], scope, name, tag_start)
+                            self.spans.append(block)
+                            self.record_tag(name, token, scope_stack)
+                            cmds.append(self.tag_command(name, token, block,
+                                                         tag_start))
+                            current = Template.TEXT
+                            skip = span[1]
+                        elif is_block_tag:
                             cmd_stack.append(cmds)
                             tag_stack.append(name)
                             token_stack.append(token)
+                            scope_stack.append(
+                                    tag_manager.dependencies(name, token)[1])
+                            offset_stack.append(tag_start)
                             cmds = []
                         else:
-                            cmds.append(self.tag(name, token, ()))
+                            self.record_tag(name, token, scope_stack)
+                            cmds.append(self.tag_command(name, token, (),
+                                                         tag_start))
                     token = ''
                 else:
-                    token += str(char)
+                    token += char
             elif current == Template.CLOSE:
                 if char == '}':
                     current = Template.TEXT
                 else:
-                    raise Exception('Wrong template syntax')
+                    raise self.syntax_error('Wrong template syntax', offset)
             else:
-                raise Exception('Wrong template syntax')
+                raise self.syntax_error('Wrong template syntax', offset)
         # Check stack length - detect unclosed tags
         if len(cmd_stack) > 0:
-            raise Exception('Unexpected end of input - not all tags closed')
+            raise self.syntax_error(
+                    "Unexpected end of input - tag '%s' is not closed" %
+                    tag_stack[-1], offset_stack[-1])
         # Last value
         if len(token) > 0:
-            cmds.append(Template.constant(token))
-        self.commands = cmds
+            cmds.append(self.text_command(token, text_start))
+        return cmds
+
+    @staticmethod
+    def block_span(source, offset, name):
+        '''Find the body of block tag closed at offset specified. Returns
+        the pair of closing tag start and end offsets or None when block
+        contains the tags executed on parsing and can't be compiled later
+        '''
+        if source[offset:offset + 1] != '}':
+            return None
+        stack = []
+        for match in block_tokens.finditer(source, offset + 1):
+            tag = match.group(1)
+            if tag is None:
+                continue
+            tag = tag.strip().split(' ', 1)[0]
+            if tag.startswith('end'):
+                if stack:
+                    if stack.pop() != tag[3:]:
+                        return None
+                elif tag[3:] == name:
+                    return match.start(), match.end()
+                else:
+                    return None
+            else:
+                try:
+                    if not tag_manager.is_lazy_tag(tag):
+                        return None
+                    if tag_manager.is_block_tag(tag):
+                        stack.append(tag)
+                except LookupError:
+                    return None
+        return None
+
+    def block_usage(self):
+        '''Get the list of blocks compiled on first use with the tag name,
+        line, column and number of times block was compiled
+        '''
+        return [(block.name, ) + self.line_column(block.offset) +
+                (block.compiles, ) for block in self.spans]
+
+    def text_command(self, text, offset=None):
+        '''Get command returns text. Commands are shared by all the templates
+        contain the same text, position of the first occurrence of text in
+        template is saved into template's commands table
+        '''
+        with text_lock:
+            cmd = text_commands.get(text, None)
+            if cmd is None:
+                cmd = text_commands[text] = Template.constant(text)
+                text_nodes[cmd] = (Template.TEXT, text, None)
+        if offset is not None and cmd not in self.nodes:
+            self.nodes[cmd] = text_nodes[cmd][:2] + (offset, )
+        return cmd
+
+    @staticmethod
+    def is_constant_filter(token):
+        '''Check is filter expression result known on parsing: all the
+        filters are pure and applied to constants
+        '''
+        variable, filters = Template.parse_filter(token)
+        if not Template.filter_value(variable)[0]:
+            return False
+        for filter_name, _, types in filters:
+            if VARIABLE in types or not filter_manager.is_pure(filter_name):
+                return False
+        return True
+
+    def filter_command(self, token, offset=None):
+        '''Create command applies filters and save it into commands table.
+        Constant filter expressions are replaced with the result
+        '''
+        cmd = Template.filter(token, self.autoescape, self.formatters)
+        if Template.is_constant_filter(token):
+            try:
+                return self.text_command(cmd({}))
+            except Exception:
+                # Keep the command to raise an error with position on
+                # execution
+                pass
+        self.nodes[cmd] = (Template.FILTER, token, offset)
+        return cmd
+
+    def tag_command(self, name, token, block, offset=None):
+        '''Create command calls a tag and save it into commands table
+        '''
+        cmd = self.tag(name, token, block)
+        if not isinstance(cmd, Template) and cmd not in self.nodes:
+            self.nodes[cmd] = (Template.TAG, name, token, block, offset)
+        return cmd
+
+    def node(self, command):
+        '''Get the description of command from commands table. Commands
+        copied from parent template are described in parent's table
+        '''
+        if isinstance(command, Template):
+            return None
+        node = self.nodes.get(command, None)
+        if node is None:
+            node = text_nodes.get(command, None)
+        if node is None and hasattr(self, 'parent'):
+            return self.parent.node(command)
+        return node
+
+    def line_column(self, offset):
+        '''Get line and column numbers for offset in template source
+        '''
+        line = bisect.bisect_right(self.lines, offset)
+        return line + 1, offset - (self.lines[line - 1] if line else 0) + 1
+
+    def position(self, command):
+        '''Get the position of command in template source. Returns tuple
+        contains name of template command was parsed in, line and column
+        or None if position is unknown
+        '''
+        if isinstance(command, Template):
+            return None
+        node = self.nodes.get(command, None)
+        if node is None:
+            if hasattr(self, 'parent'):
+                return self.parent.position(command)
+            return None
+        if node[-1] is None:
+            return None
+        return (self.origin, ) + self.line_column(node[-1])
+
+    def syntax_error(self, message, offset):
+        '''Create syntax error for position in template source
+        '''
+        line, column = self.line_column(offset)
+        return TemplateSyntaxError(message, self.name, line, column)
+
+    def record_variable(self, path, scope):
+        '''Save variable path resolved by template. Paths started with the
+        names set by enclosing block tags (like loop variable in "for" tag) are
+        not taken from context, so they are skipped
+        '''
+        root = path.split('.', 1)[0]
+        for names in scope:
+            if root in names:
+                return
+        self.variables.add(path)
+
+    @staticmethod
+    def filter_paths(token):
+        '''Get variable paths used in filter expression
+        '''
+        variable, filters = Template.parse_filter(token)
+        paths = []
+        if not Template.filter_value(variable)[0]:
+            paths.append(variable)
+        for _, args, types in filters:
+            paths.extend([arg for arg, arg_type in zip(args, types)
+                          if arg_type == VARIABLE])
+        return paths
+
+    def record_filter(self, token, scope):
+        '''Save variables and filters used in filter expression
+        '''
+        for path in Template.filter_paths(token):
+            self.record_variable(path, scope)
+        for filter_name, _, _ in Template.parse_filter(token)[1]:
+            self.filters.add(filter_name)
+
+    def record_tag(self, name, token, scope):
+        '''Save tag and variables resolved by tag
+        '''
+        self.tags.append((name, token))
+        for path in tag_manager.dependencies(name, token)[0]:
+            self.record_variable(path, scope)
+
+    def dependencies(self):
+        '''Get the report about context variables, filters, tags and templates
+        used by template. Report includes reports for parent template and
+        all the templates included with "include" tag::
+
+            >>> template = loader.get_template('index.html')
+            >>> report = template.dependencies()
+            >>> report.variables
+            set(['title'])
+            >>> report.parent.name
+            'base.html'
+            >>> report.all_variables()
+            set(['title', 'user.name'])
+
+        See :class:`Dependencies`
+        '''
+        return self.collect_dependencies({})
+
+    def collect_dependencies(self, reports):
+        '''Create dependencies report using reports dictionary to store
+        reports already created. It prevents infinite recursion on templates
+        including itself
+        '''
+        if self.name in reports:
+            return reports[self.name]
+        report = Dependencies(self.name)
+        reports[self.name] = report
+        for block in self.spans:
+            # Block bodies record their dependencies on compilation
+            block.compile()
+        report.signature = self.signature()
+        report.variables.update(self.variables)
+        report.filters.update(self.filters)
+        for node in self.nodes.values():
+            if node[-1] is None:
+                continue
+            if node[0] == Template.ECHO:
+                paths = (node[1], )
+            elif node[0] == Template.FILTER:
+                paths = Template.filter_paths(node[1])
+            elif node[0] == Template.TAG:
+                paths = tag_manager.dependencies(node[1], node[2])[0]
+            else:
+                continue
+            for path in paths:
+                if path in self.variables:
+                    report.locations.setdefault(path, []).append(
+                            self.line_column(node[-1]))
+        for name, token in self.tags:
+            report.tags.add(name)
+            if name == 'include':
+                tokens, types = parse_token(token)
+                if types[0] != VARIABLE:
+                    template = self.loader.get_template(tokens[0])
+                    report.includes[tokens[0]] = (
+                            template.collect_dependencies(reports))
+                elif tokens[0] in self.variables:
+                    report.dynamic_includes.add(tokens[0])
+                else:
+                    # Template name is set by enclosing tag
+                    report.dynamic_includes.add(None)
+        if hasattr(self, 'parent'):
+            report.parent = self.parent.collect_dependencies(reports)
+        return report
+
+    def signature(self):
+        '''Get the digest of compiled template: texts, variables, filters and
+        tags in the order of execution including the blocks of parent
+        template. Templates parsed from the same source have the same
+        signature in all the processes
+        '''
+        if self.digest is None:
+            digest = hashlib.md5(repr(self.autoescape).encode('utf-8'))
+            self.update_signature(digest, self.commands)
+            self.digest = digest.hexdigest()
+        return self.digest
+
+    def update_signature(self, digest, commands):
+        '''Add commands description into the digest
+        '''
+        for cmd in commands:
+            if isinstance(cmd, Template):
+                digest.update(b'block')
+                cmd.update_signature(digest, cmd.commands)
+                continue
+            node = self.node(cmd)
+            if node is None:
+                description = getattr(cmd, '__name__', '')
+            elif node[0] == Template.TAG:
+                description = repr(node[:3])
+            else:
+                description = repr(node[:2])
+            digest.update(description.encode('utf-8'))
+            if node is not None and node[0] == Template.TAG:
+                self.update_signature(digest, node[3])
+
+    def fingerprint(self, context, seen=None):
+        '''Get the hash identifies the result of execution with context
+        without execution. Hash is computed from the signatures of the
+        template, templates it extends and includes and the values of
+        context variable paths they resolve, so it can be used as HTTP
+        ETag to answer conditional requests::
+
+            etag = template.fingerprint(context)
+            if etag is not None and etag == request.if_none_match:
+                return NotModified()
+            response = Response(template(context), etag=etag)
+
+        Values are resolved by key paths, see :func:`key_paths`, so fields
+        of loop items are taken into account, and encoded like for
+        :func:`memoize`. Results of filters like "random" are not taken
+        into account. Returns None if the value can't be encoded stably,
+        the name of template included can't be resolved from context or
+        key paths can't be found. seen is the set of names of templates
+        already taken into account used on recursion.
+        '''
+        if self.fingerprint_keys is None:
+            found = self.key_paths()
+            if found is None:
+                self.fingerprint_keys = (None, (), ())
+            else:
+                report = self.dependencies()
+                signatures = sorted([item.signature
+                                     for item in report.walk()])
+                self.fingerprint_keys = (''.join(signatures),
+                                         tuple(sorted(found[0])),
+                                         tuple(sorted(found[1])))
+        signature, paths, includes = self.fingerprint_keys
+        if signature is None:
+            return None
+        values = [signature]
+        for path in paths:
+            try:
+                value = resolve_key(path, context)
+            except (AttributeError, LookupError, TypeError):
+                # Value is missing
+                values.append('!')
+                continue
+            try:
+                values.append(encode_key(value))
+            except TypeError:
+                return None
+        seen = set([self.name]) if seen is None else seen
+        for path in includes:
+            try:
+                name = resolve(path, context)
+            except (AttributeError, LookupError, TypeError):
+                return None
+            if name is None:
+                return None
+            if name in seen:
+                continue
+            seen.add(name)
+            value = self.loader.get_template(name).fingerprint(context, seen)
+            if value is None:
+                return None
+            values.append(value)
+        return hashlib.md5(', '.join(values).encode('utf-8')).hexdigest()
+
+    def paths(self):
+        '''Get the set of variable paths template resolves on execution. It
+        includes the paths used by parent template and the paths used by
+        templates included with "include" tag.
+        '''
+        return self.dependencies().all_variables()
+
+    def key_paths(self):
+        '''Get the key paths the result of execution depends on and the
+        paths of the names of templates included by variable. Fields of loop
+        variable are resolved for each item of the loop sequence, so they
+        are prefixed with the sequence path and "*" field::
+
+            >>> template = Template('{% for i in items %}{{ i.title }}' +
+            ...                     '{% endfor %}{{ user.name }}')
+            >>> template.key_paths()
+            (set(['items.*.title', 'user.name']), set())
+
+        See :func:`lighty.templates.context.resolve_key`. Returns None if
+        paths can't be found without execution: for templates included
+        recursively or included inside block tags by variable name
+        '''
+        paths = set()
+        includes = set()
+        if not self.collect_key_paths(self.commands, {}, paths, includes,
+                                      [self.name]):
+            return None
+        return paths, includes
+
+    @staticmethod
+    def key_path(path, names):
+        '''Get the key path for variable path. names maps the names set by
+        enclosing tags to the key paths of their values or None if value
+        depends on context other way
+        '''
+        root = path.split('.', 1)[0]
+        if root not in names:
+            return path
+        prefix = names[root]
+        if prefix is None:
+            return None
+        return prefix + path[len(root):]
+
+    def collect_key_paths(self, commands, names, paths, includes, stack):
+        '''Add key paths commands resolve into paths set and paths of
+        templates names included into includes set. stack is the list of
+        names of templates walked. Returns False if paths can't be found
+        '''
+        for cmd in commands:
+            if isinstance(cmd, Template):
+                if not cmd.collect_key_paths(cmd.commands, names, paths,
+                                             includes, stack):
+                    return False
+                continue
+            node = self.node(cmd)
+            if node is None or node[0] == Template.TEXT:
+                continue
+            if node[0] == Template.ECHO:
+                found = (node[1], )
+            elif node[0] == Template.FILTER:
+                found = Template.filter_paths(node[1])
+            else:
+                if not self.collect_tag_key_paths(node[1:4], names, paths,
+                                                  includes, stack):
+                    return False
+                continue
+            for path in found:
+                path = Template.key_path(path, names)
+                if path is not None:
+                    paths.add(path)
+        return True
+
+    def collect_tag_key_paths(self, node, names, paths, includes, stack):
+        '''Add key paths tag and its block contents resolve. Loop variable
+        of "for" tag and variable set by "with" tag are replaced with the
+        key paths of their values
+        '''
+        name, token, block = node
+        found, bound = tag_manager.dependencies(name, token)
+        inner = dict(names)
+        if name == 'for':
+            var_name, _, data_field = token.split(' ')
+            source = Template.key_path(data_field, names)
+            inner[var_name] = None if source is None else source + '.*'
+            inner['forloop'] = None
+            body = set()
+            if not self.collect_key_paths(block, inner, body, includes,
+                                          stack):
+                return False
+            if source is not None and not [
+                    path for path in body if path.startswith(source + '.*')]:
+                # Result depends on the number of items only
+                body.add(source + '.*')
+            paths.update(body)
+            return True
+        if name == 'with':
+            data_field, _, var_name = token.split(' ')
+            inner[var_name] = Template.key_path(data_field, names)
+            return self.collect_key_paths(block, inner, paths, includes,
+                                          stack)
+        for path in found:
+            path = Template.key_path(path, names)
+            if path is not None:
+                paths.add(path)
+        if name == 'include':
+            tokens, types = parse_token(token)
+            if types[0] != VARIABLE:
+                return walk_include(
+                        self.loader, tokens[0], stack,
+                        lambda template: template.collect_key_paths(
+                            template.commands, names, paths, includes,
+                            stack), False)
+            if names:
+                return False
+            includes.add(tokens[0])
+        for var_name in bound:
+            inner[var_name] = None
+        return self.collect_key_paths(block, inner, paths, includes, stack)
+
+    def memoize(self, keys=None, max_size=128):
+        '''Turn on the execution results memoization. Template stores up to
+        max_size results keyed by the values of context variables specified
+        with keys. If keys are not specified template uses all the key paths
+        it resolves, see :func:`key_paths`::
+
+            >>> template = Template('Hello, {{ user.name }}').memoize()
+            >>> template.memo_keys
+            ('user.name',)
+            >>> template({'user': {'name': 'Peter'}, 'request': request})
+            'Hello, Peter'
+
+        Next execution with the same user name returns the stored result
+        without commands execution. Only strings, numbers, booleans, None
+        and tuples of them are used as keys, see
+        :func:`lighty.templates.cache.encode_key`. Executions with other
+        values of keys are not memoized. ValueError is raised if keys are
+        not specified and template includes other templates by variable or
+        recursively.
+        '''
+        if keys is None:
+            found = self.key_paths()
+            if found is None or found[1]:
+                raise ValueError('Memoization keys of template %s can not '
+                                 'be found, specify them' % self.name)
+            keys = found[0]
+        self.memo_keys = tuple(sorted(keys))
+        self.memo = LRUCache(max_size)
+        return self
 
-    def execute(self, context=None):
+    def memo_key(self, context):
+        '''Get memoization key for context specified or None if values of
+        keys can't be used in key
+        '''
+        values = []
+        for path in self.memo_keys:
+            try:
+                value = resolve_key(path, context)
+            except (AttributeError, LookupError, TypeError):
+                # Value is missing
+                values.append('!')
+                continue
+            try:
+                values.append(encode_key(value))
+            except TypeError:
+                return None
+        return hashlib.md5(', '.join(values).encode('utf-8')).hexdigest()
+
+    def execute(self, context=None, profiler=None, limits=None):
         """Execute all commands on a specified context
 
         Arguments:
-            context: dict contains varibles
+            context:  dict contains varibles
+            profiler: :class:`lighty.templates.profiler.Profiler` instance
+                      used to collect execution statistics
+            limits:   :class:`lighty.templates.limits.RenderLimits` instance.
+                      RenderLimitExceeded is raised when execution exceeds
+                      one of the limits
         Returns:
             string contains the whole result
         """
+        if recorder.enabled and recorder.outermost():
+            return recorder.execute(self, context, profiler, limits)
+        context = context or {}
+        state = None
+        if limits is not None:
+            state = limits.start()
+            context = dict(context)
+            context[LIMITS_KEY] = state
+        if profiler is not None:
+            return profiler.execute(self, context)
+        # Blocks are measured as part of template executes them
+        start = timer() if stats.enabled and self.block_name is None \
+            else None
+        if self.memo is not None:
+            key = self.memo_key(context)
+            value = None if key is None else self.memo.get(key)
+            if start is not None:
+                stats.increment('memo_misses' if value is None
+                                else 'memo_hits', self.name)
+            if value is not None:
+                if start is not None:
+                    stats.render(self.name, timer() - start,
+                                 len(value) + extra_size(value))
+                return value
         result = StringIO()
-        for cmd in self.commands:
-            result.write(cmd(context or {}))
+        try:
+            if state is None:
+                for cmd in self.commands:
+                    result.write(cmd(context))
+            else:
+                for cmd in self.commands:
+                    output = state.output
+                    part = cmd(context)
+                    state.add_output(part, output)
+                    result.write(part)
+        except Exception as error:
+            self.annotate(error, cmd)
+            if start is not None:
+                stats.increment('render_errors', self.name)
+            raise
         value = result.getvalue()
         result.close()
+        if self.memo is not None and key is not None:
+            self.memo.set(key, value)
+        if start is not None:
+            stats.render(self.name, timer() - start,
+                         len(value) + extra_size(value))
         return value
 
+    def render_to(self, writer, context=None, encoding='utf-8'):
+        """Execute template and write encoded result into writer without
+        building the whole result string. Text parts of template are encoded
+        once and only the values printed are encoded on execution::
+
+            >>> buffer = bytearray()
+            >>> Template('Hello {{ name }}!').render_to(buffer, {'name': 'J'})
+            >>> buffer
+            bytearray(b'Hello J!')
+
+        Arguments:
+            writer:   file-like object with write method or bytearray
+            context:  dict contains varibles
+            encoding: output encoding
+        """
+        if isinstance(writer, bytearray):
+            write = writer.extend
+        else:
+            write = writer.write
+        context = context or {}
+        if self.memo is not None or stats.enabled:
+            write(self.execute(context).encode(encoding))
+        else:
+            self.write_encoded(write, context, encoding)
+
+    def encoded_commands(self, encoding):
+        """Get the list of commands where text commands are replaced with
+        encoded text. Adjacent texts are merged
+        """
+        encoded = self.encoded.get(encoding, None)
+        if encoded is None:
+            encoded = []
+            for cmd in self.commands:
+                node = self.node(cmd)
+                if node is None or node[0] != Template.TEXT:
+                    encoded.append(cmd)
+                elif encoded and encoded[-1].__class__ is bytes:
+                    encoded[-1] += node[1].encode(encoding)
+                elif node[1]:
+                    encoded.append(node[1].encode(encoding))
+            self.encoded[encoding] = encoded
+        return encoded
+
+    def freeze(self, encodings=('utf-8', )):
+        """Lay out compiled template with fewer mutable objects, so memory
+        pages stay shared by the processes forked after that. Block bodies
+        are compiled, lists of commands become tuples and encoded commands
+        are prepared for the encodings specified. Template can't be parsed
+        again after that.
+        """
+        for block in self.spans:
+            block.compile()
+        for cmd in self.commands:
+            if isinstance(cmd, Template):
+                cmd.freeze(encodings)
+        self.commands = tuple(self.commands)
+        self.tags = tuple(self.tags)
+        self.variables = frozenset(self.variables)
+        self.filters = frozenset(self.filters)
+        self.spans = tuple(self.spans)
+        for encoding in encodings:
+            self.encoded[encoding] = tuple(self.encoded_commands(encoding))
+
+    def write_encoded(self, write, context, encoding):
+        """Execute commands and write encoded results
+        """
+        try:
+            for cmd in self.encoded_commands(encoding):
+                if cmd.__class__ is bytes:
+                    write(cmd)
+                elif isinstance(cmd, Template):
+                    cmd.write_encoded(write, context, encoding)
+                else:
+                    write(cmd(context).encode(encoding))
+        except Exception as error:
+            self.annotate(error, cmd)
+            raise
+
+    def render_many(self, contexts, sink=None, processes=None, ordered=True,
+                    chunk_size=64):
+        """Execute template against each context from iterable. It's faster
+        than calling execute in a loop because the output buffer and commands
+        list are set up once for all the contexts::
+
+            >>> template = Template('Hello {{ name }}!')
+            >>> list(template.render_many([{'name': 'John'},
+            ...                            {'name': 'Peter'}]))
+            ['Hello John!', 'Hello Peter!']
+
+        Arguments:
+            contexts:   iterable with dicts contains variables
+            sink:       function called with each result, e.g. file's write
+            processes:  number of processes to split contexts between. Use it
+                        for CPU bound templates only, because contexts and
+                        results are pickled to pass them between processes
+            ordered:    keep results in contexts order when processes used.
+                        If False results are yielded as soon as they are
+                        ready as pairs of context index and result
+            chunk_size: number of contexts sent to process at once
+        Returns:
+            generator of results or None if sink specified
+        """
+        if processes:
+            from .batch import render_parallel
+            results = render_parallel(self, contexts, processes, ordered,
+                                      chunk_size)
+        elif self.memo is not None or stats.enabled:
+            results = (self.execute(context) for context in contexts)
+        else:
+            results = self.iterate_many(contexts)
+        if sink is None:
+            return results
+        for result in results:
+            sink(result)
+
+    def iterate_many(self, contexts):
+        """Generator executes commands for each context reusing the buffer
+        """
+        commands = self.commands
+        parts = []
+        write = parts.append
+        for context in contexts:
+            context = context or {}
+            try:
+                for cmd in commands:
+                    write(cmd(context))
+            except Exception as error:
+                self.annotate(error, cmd)
+                raise
+            yield ''.join(parts)
+            del parts[:]
+
+    def annotate(self, error, command):
+        '''Save the position of command raised an error into error's
+        template_position attribute. Position of the innermost template
+        command is saved
+        '''
+        if getattr(error, 'template_position', None) is not None:
+            return
+        if isinstance(command, Template):
+            return
+        position = self.position(command)
+        error.template_position = position
+        if position is not None and hasattr(error, 'add_note'):
+            error.add_note('In template %s, line %d, column %d' % position)
+
     def __call__(self, context=None):
         """Alias for execute()
         """
         return self.execute(context or {})
 
-    def partial(self, context, name=''):
-        """Execute all commands on a specified context and cache the result as
-        another template ready for execution
+    def partial(self, context, name='', static=None, max_unroll=16,
+                register=True):
+        """Execute all commands that depends only on static variables and
+        cache the result as another template ready for execution. Tags with
+        partial execution support are specialized: "if" with static condition
+        is replaced with the block contents or removed, "for" over static
+        sequence is unrolled, "with" with static value is folded, "include"
+        inlines the template included. Constant results are merged::
+
+            >>> template = Template('{% for l in langs %}<a>{{ l }}</a>' +
+            ...                     '{% endfor %}{{ user.name }}')
+            >>> part = template.partial({'langs': ['en', 'de']})
+            >>> len(part.commands)
+            2
+            >>> part({'user': {'name': 'Peter'}})
+            '<a>en</a><a>de</a>Peter'
 
         Arguments:
             context:    dict contains variables
             name:       new template name
+            static:     names of context variables known on partial execution.
+                        All the other variables are resolved on execution.
+                        By default all the names from context are static.
+            max_unroll: max length of static sequence "for" tag unrolls
+            register:   register the new template in loader
         Returns:
             another template contains the result
         """
-        result = Template(loader=self.loader, name=name)
-        buff = StringIO()
-        for cmd in self.commands:
-            try:
-                buff.write(cmd(context))
-            except Exception:
-                value = buff.getvalue()
-                if len(value) > 0:
-                    result.commands.append(Template.constant(value))
-                result.commands.append(cmd)
-                buff.close()
-                buff = StringIO()
-        value = buff.getvalue()
-        buff.close()
-        if len(value) > 0:
-            result.commands.append(Template.constant(value))
+        if static is None:
+            static = context.keys()
+        static = frozenset(static)
+        result = Template(loader=self.loader, name=name,
+                          autoescape=self.autoescape, register=register,
+                          formatters=self.formatters)
+        partial = Partial(self, result, max_unroll)
+        result.commands = partial.join(
+                partial.commands(self.commands, context, static))
+        result.variables = set([path for path in self.paths()
+                                if not partial.is_static(path, static)])
+        result.filters = self.dependencies().all_filters()
+        result.tags = list(self.tags)
         return result
 
 
+class Partial(object):
+    '''Partial template execution state. Object passed into tag's partial
+    execution functions registered with tag manager. Partial execution
+    works with items lists: string items are constants already rendered,
+    callable items are commands required to be executed. includes is the
+    stack of names of the templates being inlined.
+    '''
+
+    def __init__(self, source, target, max_unroll=16):
+        super(Partial, self).__init__()
+        self.source = source
+        self.target = target
+        self.max_unroll = max_unroll
+        self.includes = [source.name]
+
+    @staticmethod
+    def is_static(path, static):
+        '''Check is variable path can be resolved on partial execution
+        '''
+        return path.split('.', 1)[0] in static
+
+    def is_static_filter(self, token, static):
+        '''Check are all the values filter expression uses static and all
+        the filters are pure
+        '''
+        for path in Template.filter_paths(token):
+            if not self.is_static(path, static):
+                return False
+        for filter_name, _, _ in Template.parse_filter(token)[1]:
+            if not filter_manager.is_pure(filter_name):
+                return False
+        return True
+
+    def commands(self, commands, context, static, source=None):
+        '''Partially execute commands. Returns the list of items
+        '''
+        previous = self.source
+        if source is not None:
+            self.source = source
+        items = []
+        for cmd in commands:
+            if isinstance(cmd, Template):
+                items.extend(self.commands(cmd.commands, context, static, cmd))
+                continue
+            node = self.source.node(cmd)
+            if node is None:
+                items.append(cmd)
+            elif node[0] == Template.TEXT:
+                items.append(node[1])
+            elif node[0] == Template.ECHO:
+                if self.is_static(node[1], static):
+                    items.append(cmd(context))
+                else:
+                    items.append(self.keep(cmd, node, context, static))
+            elif node[0] == Template.FILTER:
+                if self.is_static_filter(node[1], static):
+                    items.append(cmd(context))
+                else:
+                    items.append(self.keep(cmd, node, context, static))
+            else:
+                name, token, block = node[1:4]
+                result = tag_manager.partial(name, token, block, context,
+                                             static, self)
+                if result is None:
+                    items.append(self.keep(cmd, node, context, static))
+                else:
+                    items.extend(result)
+        self.source = previous
+        return items
+
+    def keep(self, cmd, node, context, static):
+        '''Save the command into target template's commands table. Position
+        of the command in the source is not saved. Command is bound to the
+        values of static variables it resolves
+        '''
+        from .templatetags import block_paths
+        self.target.nodes[cmd] = node[:-1] + (None, )
+        return self.bind(cmd, block_paths([cmd], self.source, None), context,
+                         static)
+
+    def bind(self, cmd, paths, context, static):
+        '''Create command executes cmd with the values of static variables
+        from paths specified set in context. Values are not passed on
+        execution, so commands kept should get them from partial execution
+        context
+        '''
+        from .templatetags import bind
+        values = {}
+        for path in paths:
+            name = path.split('.', 1)[0]
+            if name in static and name in context:
+                values[name] = context[name]
+        if not values:
+            return cmd
+        return bind([cmd], values)
+
+    def join(self, items):
+        '''Merge constant items and create the commands list
+        '''
+        commands = []
+        text = []
+        for item in items:
+            if callable(item):
+                if text:
+                    commands.append(self.target.text_command(''.join(text)))
+                    text = []
+                commands.append(item)
+            elif item:
+                text.append(item)
+        if text:
+            commands.append(self.target.text_command(''.join(text)))
+        return commands
+
+    def tag(self, name, token, items, context, static):
+        '''Create tag command with block contents created from items. Tag is
+        bound to the values of static variables it resolves
+        '''
+        cmd = self.target.tag_command(name, token, self.join(items))
+        return self.bind(cmd, tag_manager.dependencies(name, token)[0],
+                         context, static)
+
+
+class Dependencies(object):
+    '''Report about template dependencies. Contains:
+
+        name:       template name
+        variables:  set of context variable paths template resolves
+        filters:    set of filter names template uses
+        tags:       set of tag names template uses
+        parent:     report for template extended or None
+        includes:   dict with reports for templates included
+        locations:  dict with lists of line and column pairs where each
+                    variable is used
+        signature:  digest of compiled template, see
+                    :func:`Template.signature`
+        dynamic_includes:   set of variable paths contain the names of
+                            templates included, None for the names set
+                            by enclosing tags
+    '''
+
+    def __init__(self, name):
+        super(Dependencies, self).__init__()
+        self.name = name
+        self.variables = set()
+        self.filters = set()
+        self.tags = set()
+        self.parent = None
+        self.includes = {}
+        self.locations = {}
+        self.signature = None
+        self.dynamic_includes = set()
+
+    def walk(self):
+        '''Iterate over this report and all the reports for parent and
+        included templates
+        '''
+        seen = set()
+        reports = [self]
+        while reports:
+            report = reports.pop()
+            if report.name in seen:
+                continue
+            seen.add(report.name)
+            yield report
+            if report.parent is not None:
+                reports.append(report.parent)
+            reports.extend(report.includes.values())
+
+    def templates(self):
+        '''Get names of all the templates used
+        '''
+        return set([report.name for report in self.walk()])
+
+    def all_variables(self):
+        '''Get all the context variable paths resolved
+        '''
+        return set().union(*[report.variables for report in self.walk()])
+
+    def all_filters(self):
+        '''Get names of all the filters used
+        '''
+        return set().union(*[report.filters for report in self.walk()])
+
+    def all_tags(self):
+        '''Get names of all the tags used
+        '''
+        return set().union(*[report.tags for report in self.walk()])
+
+
+class LazyBlock(list):
+    '''Commands of block tag body compiled from template source on first
+    access. Tags get it as usual list of commands, so the branches never
+    executed are never compiled.
+    '''
+    __slots__ = ('template', 'source', 'start', 'end', 'scope', 'name',
+                 'offset', 'compiles', 'lock')
+
+    def __init__(self, template, source, start, end, scope, name, offset):
+        super(LazyBlock, self).__init__()
+        self.template = template
+        self.source = source
+        self.start = start
+        self.end = end
+        self.scope = scope
+        self.name = name
+        self.offset = offset
+        self.compiles = 0
+        # Compilation changes template's tables, so it's done under the
+        # template lock
+        self.lock = template.block_lock
+
+    @property
+    def compiled(self):
+        '''Is block body already compiled
+        '''
+        return self.source is None
+
+    def compile(self):
+        '''Compile block body if it's not compiled yet
+        '''
+        if self.source is None:
+            return
+        with self.lock:
+            # Other thread could compile block while we were waiting
+            if self.source is None:
+                return
+            start = timer() if stats.enabled else None
+            self.extend(self.template.compile(self.source, [], self.start,
+                                              self.end, deque(self.scope)))
+            self.source = None
+            self.scope = None
+            self.compiles += 1
+            if start is not None:
+                stats.increment('block_compiles', self.template.name)
+                stats.observe('block_compile_time', self.template.name,
+                              timer() - start)
+
+    def __iter__(self):
+        self.compile()
+        return super(LazyBlock, self).__iter__()
+
+    def __reversed__(self):
+        self.compile()
+        return super(LazyBlock, self).__reversed__()
+
+    def __len__(self):
+        self.compile()
+        return super(LazyBlock, self).__len__()
+
+    def __getitem__(self, index):
+        self.compile()
+        return super(LazyBlock, self).__getitem__(index)
+
+    def __contains__(self, command):
+        self.compile()
+        return super(LazyBlock, self).__contains__(command)
+
+    def __bool__(self):
+        self.compile()
+        return super(LazyBlock, self).__len__() > 0
+    __nonzero__ = __bool__
+
+
 class LazyTemplate(Template):
     '''Lazy template class change the way how template loaded. :class: Template
     parses template context on template creation if template text provided::
@@ -388,28 +1559,88 @@ class LazyTemplate(Template):
     process because it does not require to parse all the templates when they
     even not used.
     '''
+    __slots__ = ('text', 'lock')
 
-    def __init__(self, text=None, loader=TemplateLoader(), name="unnamed"):
-        super(LazyTemplate, self).__init__(text, loader, name)
+    def __init__(self, text=None, loader=TemplateLoader(), name="unnamed",
+                 autoescape=False, lazy_blocks=False, formatters=None):
+        super(LazyTemplate, self).__init__(text, loader, name, autoescape,
+                                           lazy_blocks=lazy_blocks,
+                                           formatters=formatters)
         self.text = text
+        self.lock = threading.RLock()
 
     def prepare(self):
         '''Prepare to execution
         '''
-        if self.text:
+        if not self.text:
+            return
+        with self.lock:
+            # Other thread could parse template while we were waiting
+            if not self.text:
+                return
+            start = timer() if stats.enabled else None
             super(LazyTemplate, self).parse(self.text)
             self.text = None
+            if start is not None:
+                stats.observe('parse_time', self.name, timer() - start)
 
     def parse(self, text):
         '''Parse template later
         '''
         self.text = text
 
-    def execute(self, context=None):
+    def freeze(self, encodings=('utf-8', )):
+        '''Parse template and lay it out to be shared by forked processes
+        '''
+        self.prepare()
+        super(LazyTemplate, self).freeze(encodings)
+
+    def signature(self):
+        '''Parse template and get the digest of compiled template
+        '''
+        self.prepare()
+        return super(LazyTemplate, self).signature()
+
+    def collect_dependencies(self, reports):
+        '''Parse template and create dependencies report
+        '''
+        self.prepare()
+        return super(LazyTemplate, self).collect_dependencies(reports)
+
+    def key_paths(self):
+        '''Parse template and get the key paths of values result depends on
+        '''
+        self.prepare()
+        return super(LazyTemplate, self).key_paths()
+
+    def partial(self, context, name='', static=None, max_unroll=16,
+                register=True):
+        '''Parse template and execute it partially
+        '''
+        self.prepare()
+        return super(LazyTemplate, self).partial(context, name, static,
+                                                 max_unroll, register)
+
+    def render_many(self, contexts, sink=None, processes=None, ordered=True,
+                    chunk_size=64):
+        '''Parse template and execute it against each context
+        '''
+        self.prepare()
+        return super(LazyTemplate, self).render_many(contexts, sink,
+                                                     processes, ordered,
+                                                     chunk_size)
+
+    def render_to(self, writer, context=None, encoding='utf-8'):
+        '''Parse template and write encoded result into writer
+        '''
+        self.prepare()
+        return super(LazyTemplate, self).render_to(writer, context, encoding)
+
+    def execute(self, context=None, profiler=None, limits=None):
         '''Execute
         '''
         self.prepare()  # First call prepare
-        super(LazyTemplate, self).execute(context)
+        return super(LazyTemplate, self).execute(context, profiler, limits)
 
 from .template import Template
 from . import templatefilters, templatetags
@@ -0,0 +1,244 @@
+"""Package provides static analysis of templates looking for the constructs
+expensive on execution. Run it for templates directories to get the list of
+findings sorted by estimated cost::
+
+    python -m lighty.templates.analyzer templates/ --min-cost 50
+"""
+import argparse
+import sys
+
+from .loaders import FSLoader
+from .tag import parse_token, VARIABLE
+from .template import Template, walk_include
+
+# Filters sorting the values on each call
+SORT_FILTERS = frozenset(('sort', 'dictsort'))
+# Tags executing block contents not on each execution
+CONDITIONAL_TAGS = frozenset(('if', 'cache'))
+
+
+class Finding(object):
+    '''Expensive construct found in template. Contains the kind of finding,
+    message, estimated cost, name of template and line and column of the
+    construct or None if position is unknown. Cost is estimated number of
+    operations per template execution, loops are supposed to iterate over
+    loop_size items
+    '''
+
+    def __init__(self, kind, message, cost, position):
+        super(Finding, self).__init__()
+        self.kind = kind
+        self.message = message
+        self.cost = cost
+        self.template, self.line, self.column = position
+
+    def __str__(self):
+        if self.line is None:
+            location = self.template
+        else:
+            location = '%s:%d:%d' % (self.template, self.line, self.column)
+        return '%s: %s: %s (cost %d)' % (location, self.kind, self.message,
+                                         self.cost)
+
+
+class Analyzer(object):
+    '''Templates analyzer::
+
+        analyzer = Analyzer(loop_size=20)
+        for finding in analyzer.analyze_loader(FSLoader(['templates'])):
+            print(finding)
+
+    Arguments:
+        loop_size:          number of iterations supposed for each loop
+        max_filters:        max number of filters applied to loop variable
+        max_extend_depth:   max number of templates in inheritance chain
+        max_block_size:     max number of commands executed unconditionally
+                            by single block
+    '''
+
+    def __init__(self, loop_size=10, max_filters=3, max_extend_depth=3,
+                 max_block_size=500):
+        super(Analyzer, self).__init__()
+        self.loop_size = loop_size
+        self.max_filters = max_filters
+        self.max_extend_depth = max_extend_depth
+        self.max_block_size = max_block_size
+        # Names of templates being walked to stop on recursive includes
+        self.active = []
+
+    def analyze(self, template):
+        '''Get the list of findings for template sorted by cost
+        '''
+        if hasattr(template, 'prepare'):
+            template.prepare()
+        findings = []
+        self.active.append(template.name)
+        try:
+            self.walk(template, template.commands, 1, frozenset(), False,
+                      findings)
+        finally:
+            self.active.pop()
+        depth = 0
+        parent = template
+        while hasattr(parent, 'parent'):
+            depth += 1
+            parent = parent.parent
+        if depth > self.max_extend_depth:
+            findings.append(Finding(
+                    'extend-chain', '%d templates extended' % depth, depth,
+                    (template.name, None, None)))
+        findings.sort(key=lambda finding: -finding.cost)
+        return findings
+
+    def analyze_loader(self, loader):
+        '''Get the list of findings for all the templates loaded sorted by
+        cost. Findings in parent templates are reported once
+        '''
+        findings = []
+        seen = set()
+        for name in sorted(loader.templates):
+            for finding in self.analyze(loader.templates[name]):
+                key = (finding.kind, finding.template, finding.line,
+                       finding.column, finding.message)
+                if key not in seen:
+                    seen.add(key)
+                    findings.append(finding)
+        findings.sort(key=lambda finding: -finding.cost)
+        return findings
+
+    def estimate(self, template):
+        '''Get the number of commands template executes unconditionally
+        '''
+        if hasattr(template, 'prepare'):
+            template.prepare()
+        self.active.append(template.name)
+        try:
+            return self.walk(template, template.commands, 1, frozenset(),
+                             True, [])
+        finally:
+            self.active.pop()
+
+    def walk(self, template, commands, multiplier, loop_names, conditional,
+             findings):
+        '''Check commands executed multiplier times per template execution.
+        Returns the estimated number of commands executed unconditionally
+        '''
+        size = 0
+        for cmd in commands:
+            if isinstance(cmd, Template):
+                block_size = self.walk(cmd, cmd.commands, multiplier,
+                                       loop_names, conditional, findings)
+                if not conditional and block_size > self.max_block_size:
+                    findings.append(Finding(
+                            'huge-block', "block '%s' executes %d commands "
+                            "unconditionally" % (cmd.block_name, block_size),
+                            block_size * multiplier,
+                            (cmd.origin, None, None)))
+                size += block_size
+                continue
+            size += 1
+            node = template.node(cmd)
+            if node is None:
+                continue
+            position = template.position(cmd) or (template.origin, None,
+                                                   None)
+            if node[0] == Template.FILTER:
+                self.check_filter(node[1], multiplier, loop_names, position,
+                                  findings)
+            elif node[0] == Template.TAG:
+                name, token, block = node[1:4]
+                if name == 'include' and loop_names:
+                    self.check_include(template, token, multiplier, position,
+                                       findings)
+                if name == 'for':
+                    names = loop_names | frozenset(
+                            (token.split(' ', 1)[0], 'forloop'))
+                    size += self.loop_size * self.walk(
+                            template, block, multiplier * self.loop_size,
+                            names, conditional, findings)
+                elif name in CONDITIONAL_TAGS:
+                    self.walk(template, block, multiplier, loop_names, True,
+                              findings)
+                else:
+                    size += self.walk(template, block, multiplier,
+                                      loop_names, conditional, findings)
+        return size
+
+    def check_filter(self, token, multiplier, loop_names, position,
+                     findings):
+        '''Check filter expression executed multiplier times
+        '''
+        variable, filters = Template.parse_filter(token)
+        if loop_names and variable.split('.', 1)[0] in loop_names and \
+                len(filters) >= self.max_filters:
+            findings.append(Finding(
+                    'filter-chain', '%d filters applied to loop variable '
+                    '"%s"' % (len(filters), variable),
+                    multiplier * len(filters), position))
+        for name, _, _ in filters:
+            if name in SORT_FILTERS and loop_names:
+                findings.append(Finding(
+                        'sort-in-loop', '"%s" filter sorts "%s" on each '
+                        'iteration' % (name, variable),
+                        multiplier * self.loop_size, position))
+            elif name == 'get':
+                findings.append(Finding(
+                        'dict-get', '"get" filter sorts the keys of dict '
+                        '"%s" on each call' % variable,
+                        multiplier * self.loop_size, position))
+
+    def check_include(self, template, token, multiplier, position,
+                      findings):
+        '''Check include tag executed in loop. Recursive include is
+        counted as single command
+        '''
+        tokens, types = parse_token(token)
+        size = 1
+        if types[0] != VARIABLE:
+            size = walk_include(template.loader, tokens[0], self.active,
+                                lambda included: self.walk(
+                                    included, included.commands, 1,
+                                    frozenset(), True, []))
+        if size is None:
+            findings.append(Finding(
+                    'include-in-loop', 'recursive include %s inside "for" '
+                    'loop copies context on each iteration' % tokens[0],
+                    multiplier * 2, position))
+            return
+        findings.append(Finding(
+                'include-in-loop', 'include %s inside "for" loop copies '
+                'context and executes %d commands on each iteration' %
+                (tokens[0], size), multiplier * (size + 1), position))
+
+
+def main(args=None, output=None):
+    '''Command line interface. Prints findings for the templates from
+    directories specified and returns 1 if there are findings
+    '''
+    parser = argparse.ArgumentParser(
+            description='Find expensive constructs in templates')
+    parser.add_argument('dirs', nargs='+', help='templates directories')
+    parser.add_argument('--loop-size', type=int, default=10,
+                        help='number of iterations supposed for each loop')
+    parser.add_argument('--max-filters', type=int, default=3,
+                        help='max number of filters for loop variable')
+    parser.add_argument('--max-extend-depth', type=int, default=3,
+                        help='max number of templates extended')
+    parser.add_argument('--max-block-size', type=int, default=500,
+                        help='max number of commands in block')
+    parser.add_argument('--min-cost', type=int, default=0,
+                        help='do not report findings with lower cost')
+    options = parser.parse_args(args)
+    analyzer = Analyzer(options.loop_size, options.max_filters,
+                        options.max_extend_depth, options.max_block_size)
+    findings = [finding for finding in
+                analyzer.analyze_loader(FSLoader(options.dirs))
+                if finding.cost >= options.min_cost]
+    output = output or sys.stdout
+    for finding in findings:
+        output.write('%s\n' % finding)
+    return 1 if findings else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Package provides rendering of one template against many contexts in the
+pool of processes
+"""
+import itertools
+import multiprocessing
+import os
+
+try:
+    pool_context = multiprocessing.get_context('fork')
+except (AttributeError, ValueError):
+    pool_context = multiprocessing
+
+# Templates rendered by the pool workers. Workers are forked after template
+# was put here, so template is not pickled
+templates = {}
+keys = itertools.count()
+# Workers get templates only if they are forked
+can_fork = hasattr(os, 'fork')
+
+
+def chunks(contexts, chunk_size):
+    '''Split iterable into the lists of chunk_size items with the index of
+    first item
+    '''
+    iterator = iter(contexts)
+    index = 0
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield index, chunk
+        index += len(chunk)
+
+
+def render_chunk(args):
+    '''Render chunk of contexts in pool worker
+    '''
+    key, index, chunk = args
+    return index, list(templates[key].render_many(chunk))
+
+
+def render_parallel(template, contexts, processes, ordered=True,
+                    chunk_size=64):
+    '''Render template against each context in the pool of processes.
+    Contexts and results are sent between processes, so they should be
+    picklable. Returns generator of results in contexts order if ordered is
+    True or pairs of context index and result in completion order
+    otherwise. Workers get the template by forking, so RuntimeError is
+    raised where fork is not available
+    '''
+    if not can_fork:
+        raise RuntimeError('Rendering in processes requires fork, which is '
+                           'not available on this platform')
+    return iterate_parallel(template, contexts, processes, ordered,
+                            chunk_size)
+
+
+def iterate_parallel(template, contexts, processes, ordered, chunk_size):
+    '''Render template in the pool of processes. Template is kept in
+    templates table until the pool is joined, so workers pool starts again
+    get it too
+    '''
+    key = next(keys)
+    templates[key] = template
+    try:
+        pool = pool_context.Pool(processes)
+    except Exception:
+        del templates[key]
+        raise
+    try:
+        tasks = ((key, index, chunk)
+                 for index, chunk in chunks(contexts, chunk_size))
+        if ordered:
+            for _, results in pool.imap(render_chunk, tasks):
+                for result in results:
+                    yield result
+        else:
+            for index, results in pool.imap_unordered(render_chunk, tasks):
+                for offset, result in enumerate(results):
+                    yield index + offset, result
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+        del templates[key]
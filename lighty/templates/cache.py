@@ -0,0 +1,247 @@
+"""Package provides cache backends used to store rendered template fragments
+"""
+import collections
+import hashlib
+import numbers
+import os
+import os.path
+import pickle
+import tempfile
+import threading
+import time
+
+try:
+    KEY_TYPES = (basestring, numbers.Number)
+except NameError:
+    KEY_TYPES = (str, bytes, numbers.Number)
+
+
+class BaseCache(object):
+    '''Base class for cache backends. Backend stores string values by string
+    keys and forgets them after ttl seconds. ttl equals None or 0 means that
+    value never expires.
+    '''
+
+    def get(self, key):
+        '''Get value from cache. Returns None if there is no value for key or
+        value is expired
+        '''
+        raise NotImplementedError()
+
+    def set(self, key, value, ttl=None):
+        '''Put value into cache
+        '''
+        raise NotImplementedError()
+
+    def delete(self, key):
+        '''Remove value from cache
+        '''
+        raise NotImplementedError()
+
+    def clear(self):
+        '''Remove all the values from cache
+        '''
+        raise NotImplementedError()
+
+
+def encode_key(value):
+    '''Get the string representation of value stable between executions and
+    processes. Only strings, numbers, booleans, None and tuples of them can
+    be encoded: representation of other objects can contain the memory
+    address reused by another object later, so TypeError is raised for them.
+    Use the fields identify the object like user.id instead of the object
+    '''
+    if value is None or isinstance(value, KEY_TYPES):
+        return repr(value)
+    if isinstance(value, tuple):
+        return '(%s)' % ', '.join([encode_key(item) for item in value])
+    raise TypeError('%s value can not be used in key: %r' % (
+            type(value).__name__, value))
+
+
+def expires_at(ttl):
+    '''Get the time when value stored with ttl specified expires
+    '''
+    return time.time() + ttl if ttl else None
+
+
+def is_expired(expires):
+    '''Check is value with expiration time specified expired
+    '''
+    return expires is not None and expires <= time.time()
+
+
+class LRUCache(BaseCache):
+    '''In-process cache that keeps up to max_size values and drops least
+    recently used values first::
+
+        >>> cache = LRUCache(max_size=2)
+        >>> cache.set('a', '1')
+        >>> cache.set('b', '2')
+        >>> cache.get('a')
+        '1'
+        >>> cache.set('c', '3')  # 'b' is least recently used
+        >>> cache.get('b') is None
+        True
+    '''
+
+    def __init__(self, max_size=1024):
+        super(LRUCache, self).__init__()
+        self.max_size = max_size
+        self.values = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.values.pop(key, None)
+            if item is None:
+                return None
+            if is_expired(item[0]):
+                return None
+            self.values[key] = item
+            return item[1]
+
+    def set(self, key, value, ttl=None):
+        with self.lock:
+            self.values.pop(key, None)
+            self.values[key] = (expires_at(ttl), value)
+            while len(self.values) > self.max_size:
+                self.values.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.values.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.values.clear()
+
+    def __len__(self):
+        return len(self.values)
+
+
+class FileCache(BaseCache):
+    '''Cache stores values as files in directory specified. All the processes
+    uses the same directory share the values, so it can be used with pre-fork
+    servers where in-process cache is duplicated by each worker.
+    '''
+
+    def __init__(self, path):
+        super(FileCache, self).__init__()
+        self.path = path
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def file_name(self, key):
+        '''Get the name of file used to store value for key
+        '''
+        digest = hashlib.md5(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.path, digest + '.cache')
+
+    def get(self, key):
+        file_name = self.file_name(key)
+        try:
+            with open(file_name, 'rb') as handle:
+                expires, value = pickle.load(handle)
+        except (IOError, OSError, EOFError, ValueError, pickle.PickleError):
+            return None
+        if is_expired(expires):
+            self.delete(key)
+            return None
+        return value
+
+    def set(self, key, value, ttl=None):
+        # Write into temporary file and rename it to make writing atomic for
+        # other processes
+        handle, temp_name = tempfile.mkstemp(dir=self.path)
+        with os.fdopen(handle, 'wb') as temp:
+            pickle.dump((expires_at(ttl), value), temp,
+                        pickle.HIGHEST_PROTOCOL)
+        getattr(os, 'replace', os.rename)(temp_name, self.file_name(key))
+
+    def delete(self, key):
+        try:
+            os.remove(self.file_name(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        for file_name in os.listdir(self.path):
+            if file_name.endswith('.cache'):
+                try:
+                    os.remove(os.path.join(self.path, file_name))
+                except OSError:
+                    pass
+
+
+class MemcachedCache(BaseCache):
+    '''Adapter for memcached-like clients. Client should provide get(key),
+    set(key, value, ttl), delete(key) and flush_all() methods, so
+    python-memcached and pymemcache clients can be used::
+
+        import memcache
+        cache = MemcachedCache(memcache.Client(['127.0.0.1:11211']))
+    '''
+
+    def __init__(self, client, prefix='lighty'):
+        super(MemcachedCache, self).__init__()
+        self.client = client
+        self.prefix = prefix
+
+    def make_key(self, key):
+        '''Memcached does not allow long keys and keys with spaces, so hash
+        the key
+        '''
+        return '%s:%s' % (self.prefix,
+                          hashlib.md5(key.encode('utf-8')).hexdigest())
+
+    def get(self, key):
+        value = self.client.get(self.make_key(key))
+        if isinstance(value, bytes):
+            return value.decode('utf-8')
+        return value
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.make_key(key), value, int(ttl or 0))
+
+    def delete(self, key):
+        self.client.delete(self.make_key(key))
+
+    def clear(self):
+        self.client.flush_all()
+
+
+class CacheManager(object):
+    '''Class used to access the cache backend used by template tags
+    '''
+
+    def __init__(self, backend=None):
+        super(CacheManager, self).__init__()
+        self.backend = backend or LRUCache()
+
+    def set_backend(self, backend):
+        '''Change cache backend
+        '''
+        self.backend = backend
+
+    @staticmethod
+    def make_key(name, values):
+        '''Get the cache key for fragment name and values fragment depends
+        on. Values should be strings, numbers, booleans, None or tuples, see
+        :func:`encode_key`
+        '''
+        digest = hashlib.md5(encode_key(tuple(values)).encode(
+                'utf-8')).hexdigest()
+        return 'fragment:%s:%s' % (name, digest)
+
+    def get(self, key):
+        '''Get value from current backend
+        '''
+        return self.backend.get(key)
+
+    def set(self, key, value, ttl=None):
+        '''Put value into current backend
+        '''
+        self.backend.set(key, value, ttl)
+
+cache_manager = CacheManager()
@@ -1,16 +1,58 @@
 '''Methods for context accessing
 '''
 import functools
+import threading
+
+
+class Lazy(object):
+    '''Value calculated when template uses it first time. Use it for
+    expensive values template can skip::
+
+        >>> template = Template('{% if user %}{{ stats.total }}{% endif %}')
+        >>> template({'user': None, 'stats': Lazy(calculate_stats)})
+        ''
+
+    calculate_stats is not called here. Function is called once and the
+    result is used for the rest of execution, so create new Lazy values for
+    each execution if values can change.
+    '''
+    __slots__ = ('func', 'args', 'value', 'lock')
+    missing = object()
+
+    def __init__(self, func, *args):
+        super(Lazy, self).__init__()
+        self.func = func
+        self.args = args
+        self.value = Lazy.missing
+        self.lock = threading.Lock()
+
+    def get(self):
+        '''Get the value calculating it if required
+        '''
+        value = self.value
+        if value is Lazy.missing:
+            with self.lock:
+                value = self.value
+                if value is Lazy.missing:
+                    value = self.value = self.func(*self.args)
+                    self.func = self.args = None
+        return value
 
 
 def get_field(obj, field):
     '''Get field from object or item from dictionary
     '''
-    if hasattr(obj, field):
-        return getattr(obj, field)
-    elif hasattr(obj, '__getitem__') and hasattr(obj, '__contains__'):
-        return obj[field]
-    raise AttributeError('Could not get %s from %s' % (field, obj))
+    # Get attribute once, because it can be lazy loaded
+    try:
+        value = getattr(obj, field)
+    except AttributeError:
+        if hasattr(obj, '__getitem__') and hasattr(obj, '__contains__'):
+            value = obj[field]
+        else:
+            raise AttributeError('Could not get %s from %s' % (field, obj))
+    if value.__class__ is Lazy:
+        return value.get()
+    return value
 
 
 def resolve(var_name, context):
@@ -18,6 +60,73 @@ def resolve(var_name, context):
     '''
     if '.' in var_name:
         fields = var_name.split('.')
-        return functools.reduce(get_field, fields[1:],
-                                context.get(fields[0], None))
-    return context.get(var_name, None)
+        value = context.get(fields[0], None)
+        if value.__class__ is Lazy:
+            value = value.get()
+        return functools.reduce(get_field, fields[1:], value)
+    value = context.get(var_name, None)
+    if value.__class__ is Lazy:
+        return value.get()
+    return value
+
+
+def resolve_key(path, context):
+    '''Resolve a value for key path. Key path can contain "*" field meaning
+    all the items of sequence, so value of "items.*.title" is the tuple of
+    titles of all the items and value of "items.*" is the tuple of items
+    '''
+    if '.*' not in path:
+        return resolve(path, context)
+    head, _, rest = path.partition('.*')
+    values = resolve(head, context)
+    if not rest:
+        return tuple(values)
+    return tuple([resolve_key('_' + rest, {'_': value}) for value in values])
+
+
+def add_path(tree, path):
+    '''Add dotted path into fields tree used by batch_load
+    '''
+    for field in path.split('.'):
+        tree = tree.setdefault(field, {})
+
+
+def batch_load(objects, tree):
+    '''Load fields from tree for all the objects at once. Objects which class
+    has __batch_load__(objects, field) class or static method are loaded
+    with a single call per class and field, so lazy objects like ORM models
+    can fetch related values with one query instead of query per object::
+
+        class Post(Model):
+
+            @classmethod
+            def __batch_load__(cls, posts, field):
+                if field == 'owner':
+                    owners = User.objects.in_bulk([post.owner_id
+                                                   for post in posts])
+                    for post in posts:
+                        post.owner = owners[post.owner_id]
+
+    "for" tag calls it for the fields loop body uses, so::
+
+        {% for post in posts %}{{ post.owner.name }}{% endfor %}
+
+    loads owners of posts with a single query for each window of loop
+    iterations. Fields of loaded values are loaded the same way.
+    '''
+    for field, subtree in tree.items():
+        groups = {}
+        for obj in objects:
+            cls = type(obj)
+            if getattr(cls, '__batch_load__', None) is not None:
+                groups.setdefault(cls, []).append(obj)
+        for cls, group in groups.items():
+            cls.__batch_load__(group, field)
+        if subtree:
+            values = []
+            for obj in objects:
+                try:
+                    values.append(get_field(obj, field))
+                except (AttributeError, LookupError, TypeError):
+                    pass
+            batch_load(values, subtree)
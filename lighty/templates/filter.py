@@ -1,17 +1,20 @@
 """Package provides template filters management
 """
+from .context import resolve
+from .metrics import stats
 
 
 class FilterManager(object):
     """Class used for filters manipulations
     """
-    __slots__ = ('apply', 'filters', 'is_filter_exists', )
+    __slots__ = ('filters', 'pure')
 
     def __init__(self):
         """Create new tag managet instance
         """
         super(FilterManager, self).__init__()
         self.filters = {}
+        self.pure = set()
 
     def is_filter_exists(self, name):
         """Check is filter exists
@@ -20,20 +23,32 @@ class FilterManager(object):
             raise Exception("Filter '%s' is not registered" % name)
         return self.filters[name]
 
-    def register(self, filter):
-        '''Register filter in manager
+    def register(self, filter, pure=False, name=None):
+        '''Register filter in manager. Pure filter result depends only on
+        its arguments, so filter applied to constants is executed once on
+        template parsing or partial execution. Filter is registered by the
+        name of function unless name is specified
         '''
-        self.filters[filter.__name__] = filter
+        name = name or filter.__name__
+        self.filters[name] = filter
+        if pure:
+            self.pure.add(name)
+        else:
+            self.pure.discard(name)
+
+    def is_pure(self, name):
+        '''Check is filter registered as pure
+        '''
+        return name in self.pure
 
     def apply(self, filter_name, value, args, arg_types, context):
         '''Apply filter to values
         '''
         filter_func = self.is_filter_exists(filter_name)
-        new_args = []
-        i = 0
-        while i < len(args):
-            new_args.append(arg_types[i] and args[i] or context[args[i]])
-            i += 1
+        if stats.enabled:
+            stats.increment('filter_calls', filter_name)
+        new_args = [arg if arg_type else resolve(arg, context)
+                    for arg, arg_type in zip(args, arg_types)]
         return filter_func(value, *new_args)
 
 filter_manager = FilterManager()
@@ -0,0 +1,93 @@
+"""Package provides conversion of the values printed by templates into
+strings
+"""
+from .safestring import escape, escape_string, SafeString
+
+try:
+    text_type = unicode
+except NameError:
+    text_type = str
+
+
+class FormatterManager(object):
+    '''Table of functions converting the values printed by templates into
+    strings by value type. Types without formatter registered are converted
+    with str(), unicode values are kept as is on Python 2::
+
+        >>> from decimal import Decimal
+        >>> formatter_manager.register(Decimal, lambda value: '%.2f' % value)
+        >>> Template('{{ price }}')({'price': Decimal('1.5')})
+        '1.50'
+
+    Formatter registered for class is used for its subclasses too. Lookup
+    result is cached by exact type of value, so conversion costs one dict
+    lookup and the call, and str values are printed as is. Templates use
+    :data:`formatter_manager` by default, copy it to format values of single
+    template other way::
+
+        formatters = formatter_manager.copy()
+        formatters.register(float, lambda value: format(value, ',.2f'))
+        template = Template(text, formatters=formatters)
+
+    With autoescape formatters results are escaped unless they are
+    :class:`lighty.templates.safestring.SafeString`.
+    '''
+    __slots__ = ('formatters', 'cache')
+
+    def __init__(self, formatters=None):
+        super(FormatterManager, self).__init__()
+        self.formatters = dict(formatters or {})
+        self.cache = {}
+
+    def register(self, value_type, formatter):
+        '''Register function converting the values of type into strings
+        '''
+        self.formatters[value_type] = formatter
+        self.cache.clear()
+
+    def unregister(self, value_type):
+        '''Remove formatter for type
+        '''
+        self.formatters.pop(value_type, None)
+        self.cache.clear()
+
+    def copy(self):
+        '''Create manager with the same formatters
+        '''
+        return FormatterManager(self.formatters)
+
+    def lookup(self, value_type):
+        '''Get formatter for the values of type
+        '''
+        formatter = self.cache.get(value_type, None)
+        if formatter is None:
+            formatter = str
+            if isinstance(value_type, type) and issubclass(value_type,
+                                                           text_type):
+                formatter = text_type
+            for base in getattr(value_type, '__mro__', (value_type, )):
+                if base in self.formatters:
+                    formatter = self.formatters[base]
+                    break
+            self.cache[value_type] = formatter
+        return formatter
+
+    def format(self, value):
+        '''Convert value into string
+        '''
+        if value.__class__ is str:
+            return value
+        return self.lookup(value.__class__)(value)
+
+    def escape(self, value):
+        '''Convert value into string and escape it if it's required
+        '''
+        formatter = self.lookup(value.__class__)
+        if formatter is str:
+            return escape(value)
+        value = formatter(value)
+        if isinstance(value, SafeString):
+            return value
+        return escape_string(value)
+
+formatter_manager = FormatterManager()
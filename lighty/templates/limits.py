@@ -0,0 +1,145 @@
+"""Package provides resource limits for template execution
+"""
+from .metrics import timer
+
+# Context key used to pass the limits state into tags
+LIMITS_KEY = '__limits__'
+
+
+def extra_size(part):
+    '''Get the number of bytes UTF-8 encoded part takes above its length.
+    ASCII strings are not encoded
+    '''
+    if isinstance(part, bytes):
+        return 0
+    if hasattr(part, 'isascii') and part.isascii():
+        return 0
+    return len(part.encode('utf-8')) - len(part)
+
+
+class RenderLimitExceeded(Exception):
+    '''Error raised when template execution exceeds one of the limits.
+    Contains the name of limit and it's value
+    '''
+
+    def __init__(self, limit, value):
+        super(RenderLimitExceeded, self).__init__(
+                'Render limit exceeded: %s %s' % (limit, value))
+        self.limit = limit
+        self.value = value
+
+
+class RenderLimits(object):
+    '''Limits for single template execution::
+
+        limits = RenderLimits(max_iterations=100000, timeout=0.5)
+        try:
+            result = template.execute(context, limits=limits)
+        except RenderLimitExceeded as error:
+            ...
+
+    The same limits object can be used for many executions at once.
+
+    Arguments:
+        max_iterations:     max number of all the loops iterations
+        max_output:         max number of bytes template outputs encoded
+                            in UTF-8. Output size is checked after each
+                            command of template and of block tags bodies,
+                            so loop exceeding the limit is stopped on the
+                            first iteration over the limit
+        max_include_depth:  max number of nested includes
+        timeout:            max execution time in seconds
+    '''
+
+    def __init__(self, max_iterations=None, max_output=None,
+                 max_include_depth=None, timeout=None):
+        super(RenderLimits, self).__init__()
+        self.max_iterations = max_iterations
+        self.max_output = max_output
+        self.max_include_depth = max_include_depth
+        self.timeout = timeout
+
+    def start(self):
+        '''Create the state for new execution
+        '''
+        return LimitsState(self)
+
+
+class LimitsState(object):
+    '''Resources used by single execution. Output size is the number of
+    characters plus extra bytes taken by non-ASCII characters
+    '''
+    __slots__ = ('limits', 'iterations', 'output', 'extra', 'depth',
+                 'deadline')
+
+    def __init__(self, limits):
+        super(LimitsState, self).__init__()
+        self.limits = limits
+        self.iterations = 0
+        self.output = 0
+        self.extra = 0
+        self.depth = 0
+        self.deadline = timer() + limits.timeout if limits.timeout else None
+
+    def check_time(self):
+        '''Check is deadline passed
+        '''
+        if self.deadline is not None and timer() > self.deadline:
+            raise RenderLimitExceeded('timeout', self.limits.timeout)
+
+    def iterate(self, values):
+        '''Iterate over loop values counting the iterations
+        '''
+        max_iterations = self.limits.max_iterations
+        for value in values:
+            self.iterations += 1
+            if max_iterations is not None and \
+                    self.iterations > max_iterations:
+                raise RenderLimitExceeded('max_iterations', max_iterations)
+            self.check_time()
+            yield value
+
+    def add_output(self, part, start):
+        '''Count bytes of output part. start is the number of characters
+        counted before the command returned part was executed, so the
+        output of nested commands is not counted twice. Part is encoded
+        only if nested commands counted nothing, so each string is encoded
+        once at most
+        '''
+        nested = self.output != start
+        self.output = start + len(part)
+        max_output = self.limits.max_output
+        if max_output is None:
+            self.check_time()
+            return
+        if not nested:
+            self.extra += extra_size(part)
+        if self.output + self.extra > max_output:
+            raise RenderLimitExceeded('max_output', max_output)
+        self.check_time()
+
+    def execute(self, commands, context):
+        '''Execute commands counting the output. Returns the list of parts
+        '''
+        result = []
+        for command in commands:
+            start = self.output
+            part = command(context)
+            self.add_output(part, start)
+            result.append(part)
+        return result
+
+    def enter_include(self):
+        '''Count the depth of nested includes
+        '''
+        self.depth += 1
+        max_depth = self.limits.max_include_depth
+        if max_depth is not None and self.depth > max_depth:
+            self.depth -= 1
+            raise RenderLimitExceeded('max_include_depth', max_depth)
+        self.check_time()
+
+    def leave_include(self):
+        '''Decrease the depth of nested includes
+        '''
+        self.depth -= 1
@@ -1,44 +1,131 @@
 """Package provides template loaders
 """
+import gc
 import itertools
 import os
 import os.path
 
+from .cache import LRUCache
+from .metrics import stats
+
 
 class TemplateLoader(object):
     '''Class fot managing templates
     '''
 
-    def __init__(self):
+    def __init__(self, max_variants=256):
         '''Create new template loader
         '''
         super(TemplateLoader, self).__init__()
         # Create new templates dictionary
         self.templates = {}
+        self.variants = LRUCache(max_variants)
 
     def register(self, name, template):
         '''Add loaded or generated template
         '''
         self.templates[name] = template
 
+    def freeze(self, encodings=('utf-8', )):
+        '''Prepare all the templates loaded to be shared by the processes
+        forked after that. Call it in pre-fork server master process after
+        all the templates were loaded::
+
+            loader = FSLoader(['templates'])
+            loader.freeze()
+            # fork workers here
+
+        Templates are parsed and converted into tuples and bytes, then all
+        the objects allocated are moved out of garbage collector tracking
+        with gc.freeze() (Python 3.7+), so collections in workers do not
+        write into the pages shared with master.
+        '''
+        for template in list(self.templates.values()):
+            template.freeze(encodings)
+        gc.collect()
+        if hasattr(gc, 'freeze'):
+            gc.freeze()
+
     def get_template(self, name):
         '''Get template by name
         '''
         if name not in self.templates:
+            if stats.enabled:
+                stats.increment('loader_misses', name)
             raise Exception("Template '%s' was not found" % name)
+        if stats.enabled:
+            stats.increment('loader_hits', name)
         return self.templates[name]
 
+    def get_variant(self, name, static):
+        '''Get template specialized for the values of static variables. It's
+        useful when large parts of page depends only on few variables like
+        locale or site settings::
+
+            template = loader.get_variant('index.html', {'locale': 'en'})
+            template({'user': user})
+
+        Variants are created with :func:`Template.partial` and stored in
+        loader's variants cache, so next call with the same values returns
+        the same template.
+        '''
+        items = sorted(static.items())
+        key = '%s:%r' % (name, items)
+        variant = self.variants.get(key)
+        if stats.enabled:
+            stats.increment('variant_misses' if variant is None
+                            else 'variant_hits', name)
+        if variant is None:
+            variant_name = '%s?%s' % (name, '&'.join(['%s=%s' % item
+                                                      for item in items]))
+            # Variants are stored in variants cache only
+            variant = self.get_template(name).partial(
+                    static, variant_name, register=False)
+            self.variants.set(key, variant)
+        return variant
+
+    def get_skeleton(self, name, key, context):
+        '''Get the page skeleton: template executed with context once,
+        where only "nocache" blocks and the variables missing in context
+        are left to be rendered on each request::
+
+            page = loader.get_skeleton('article.html', article.id,
+                                       {'article': article})
+            page({'user': user, 'cart': cart})
+
+        Rendering of skeleton costs as much as rendering of its dynamic
+        parts. Skeletons are stored in loader's variants cache by template
+        name and key, so context is used on the first call only.
+        '''
+        cache_key = '%s#%r' % (name, key)
+        skeleton = self.variants.get(cache_key)
+        if stats.enabled:
+            stats.increment('skeleton_misses' if skeleton is None
+                            else 'skeleton_hits', name)
+        if skeleton is None:
+            skeleton_name = '%s#%s' % (name, key)
+            # Skeletons are stored in variants cache only
+            skeleton = self.get_template(name).partial(
+                    context, skeleton_name, register=False)
+            self.variants.set(cache_key, skeleton)
+        return skeleton
+
 
 class FSLoader(TemplateLoader):
     '''Class provides methods for template managing
     '''
 
-    def __init__(self, template_dirs):
+    def __init__(self, template_dirs, max_variants=256, autoescape=False,
+                 lazy_blocks=False, formatters=None):
         '''Create new FSLoader instance, retrieves all the templates from
-        template dictionaries specified and register them
+        template dictionaries specified and register them. Templates loaded
+        with autoescape escape HTML in all the values printed. Templates
+        loaded with lazy_blocks compile block tags bodies on first use.
+        Templates loaded with formatters use them to convert values printed
+        into strings.
         '''
         from .template import LazyTemplate
-        super(FSLoader, self).__init__()
+        super(FSLoader, self).__init__(max_variants)
         for path in template_dirs:
             for root, _, files in os.walk(path):
                 if root.startswith(path):
@@ -53,4 +140,7 @@ class FSLoader(TemplateLoader):
                     file_path = os.path.join(root, file_name)
                     with open(file_path, 'r') as handle:
                         content = itertools.chain(*handle.readlines())
-                        LazyTemplate(content, name=name, loader=self)
+                        LazyTemplate(content, name=name, loader=self,
+                                     autoescape=autoescape,
+                                     lazy_blocks=lazy_blocks,
+                                     formatters=formatters)
@@ -0,0 +1,147 @@
+"""Package provides in-process aggregator for template rendering metrics
+"""
+import bisect
+import threading
+import time
+
+try:
+    timer = time.perf_counter
+except AttributeError:
+    timer = time.time
+
+# Upper bounds of histogram buckets in seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+           1.0, 2.5)
+
+
+class Histogram(object):
+    '''Histogram counts values in buckets with upper bounds specified. Last
+    bucket counts values greater than all the bounds
+    '''
+    __slots__ = ('bounds', 'counts', 'count', 'total')
+
+    def __init__(self, bounds=BUCKETS):
+        super(Histogram, self).__init__()
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0
+
+    def observe(self, value):
+        '''Add value to histogram
+        '''
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def snapshot(self):
+        '''Get the dict with histogram values
+        '''
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'buckets': list(zip(self.bounds + (float('inf'), ), self.counts))
+        }
+
+
+class StatsRegistry(object):
+    '''Registry collects counters and histograms grouped by metric name and
+    template, tag, filter or fragment name. Collecting is disabled by default
+    to keep rendering free from the overhead::
+
+        >>> from lighty.templates.metrics import stats
+        >>> stats.enable()
+        >>> template({'user': user})
+        >>> stats.snapshot()['counters']['renders']
+        {'index.html': 1}
+
+    Metrics collected:
+
+        renders, render_errors  number of template executions and failures
+        render_time             histogram of execution time in seconds
+        render_size             number of bytes rendered in UTF-8
+        parse_time              histogram of lazy template parsing time
+        loader_hits, loader_misses, variant_hits, variant_misses,
+        memo_hits, memo_misses, fragment_hits, fragment_misses
+                                loader, variants, memoization and "cache"
+                                tag lookups
+        tag_calls, filter_calls number of tags and filters executed
+
+    Snapshot can be taken from any thread. Callbacks added with
+    :func:`add_callback` are called with kind ('counter' or 'histogram'),
+    metric name, key and value for each update and can be used to pass
+    values to external metrics pipeline directly.
+    '''
+
+    def __init__(self, buckets=BUCKETS):
+        super(StatsRegistry, self).__init__()
+        self.enabled = False
+        self.buckets = buckets
+        self.counters = {}
+        self.histograms = {}
+        self.callbacks = []
+        self.lock = threading.Lock()
+
+    def enable(self, enabled=True):
+        '''Turn metrics collecting on or off
+        '''
+        self.enabled = enabled
+
+    def add_callback(self, callback):
+        '''Add function called on each metric update
+        '''
+        self.callbacks.append(callback)
+
+    def remove_callback(self, callback):
+        '''Remove function added with add_callback
+        '''
+        self.callbacks.remove(callback)
+
+    def increment(self, metric, key, value=1):
+        '''Increase counter value
+        '''
+        with self.lock:
+            counters = self.counters.setdefault(metric, {})
+            counters[key] = counters.get(key, 0) + value
+        for callback in self.callbacks:
+            callback('counter', metric, key, value)
+
+    def observe(self, metric, key, value):
+        '''Add value to histogram
+        '''
+        with self.lock:
+            histograms = self.histograms.setdefault(metric, {})
+            histogram = histograms.get(key, None)
+            if histogram is None:
+                histogram = histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+        for callback in self.callbacks:
+            callback('histogram', metric, key, value)
+
+    def render(self, name, elapsed, size):
+        '''Save metrics for template execution
+        '''
+        self.increment('renders', name)
+        self.increment('render_size', name, size)
+        self.observe('render_time', name, elapsed)
+
+    def snapshot(self):
+        '''Get the copy of all the values collected
+        '''
+        with self.lock:
+            counters = dict([(metric, dict(values))
+                             for metric, values in self.counters.items()])
+            histograms = dict([(metric, dict([(key, histogram.snapshot())
+                                              for key, histogram
+                                              in values.items()]))
+                               for metric, values in self.histograms.items()])
+        return {'counters': counters, 'histograms': histograms}
+
+    def reset(self):
+        '''Remove all the values collected
+        '''
+        with self.lock:
+            self.counters = {}
+            self.histograms = {}
+
+stats = StatsRegistry()
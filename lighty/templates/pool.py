@@ -0,0 +1,165 @@
+"""Package provides the pool of processes rendering templates
+"""
+from collections import deque
+import sys
+import threading
+
+from .batch import pool_context
+
+# Loader created in worker process by pool initializer
+loader = None
+
+
+def init_worker(loader_factory):
+    '''Create templates loader in worker process
+    '''
+    global loader
+    loader = loader_factory()
+
+
+def render_job(job):
+    '''Render template in worker process. Returns the pair of success flag
+    and result or error raised
+    '''
+    name, context = job
+    try:
+        return True, loader.get_template(name).execute(context)
+    except Exception as error:
+        return False, error
+
+
+class RenderResult(object):
+    '''Result of template rendering submitted to pool. release is called
+    when job failed in the pool itself (result or context can't be pickled,
+    worker died) on Python 2, where the pool has no error callback
+    '''
+
+    def __init__(self, result, release=None):
+        super(RenderResult, self).__init__()
+        self.result = result
+        self.release = release
+
+    def ready(self):
+        '''Check is rendering finished
+        '''
+        return self.result.ready()
+
+    def get(self, timeout=None):
+        '''Wait for rendered string. Raises the error raised by template
+        '''
+        try:
+            success, value = self.result.get(timeout)
+        except Exception:
+            if self.release is not None and self.result.ready():
+                self.release, release = None, self.release
+                release(None)
+            raise
+        if success:
+            return value
+        raise value
+
+
+class RenderPool(object):
+    '''Pool of processes renders templates by name. Each worker creates its
+    own loader with loader_factory once, so templates are parsed once per
+    worker and rendering of large pages does not hold the GIL of the
+    process submitted jobs::
+
+        from functools import partial
+
+        pool = RenderPool(partial(FSLoader, ['templates']), processes=4,
+                          max_pending=64)
+        html = pool.render('index.html', {'user': user})
+        for page in pool.map(('page.html', context) for context in pages):
+            ...
+        pool.close()
+
+    Contexts and results are pickled to pass them between processes, so
+    use the pool for CPU-bound templates only.
+
+    Arguments:
+        loader_factory:         picklable function returns templates loader
+        processes:              number of worker processes, by default
+                                number of CPUs
+        max_tasks_per_child:    number of jobs worker renders before it's
+                                replaced with fresh process. None means
+                                workers live as long as the pool
+        max_pending:            max number of jobs submitted but not
+                                finished. submit() blocks when the limit is
+                                reached. None means no limit
+    '''
+
+    def __init__(self, loader_factory, processes=None,
+                 max_tasks_per_child=None, max_pending=None):
+        super(RenderPool, self).__init__()
+        self.pool = pool_context.Pool(processes, init_worker,
+                                      (loader_factory, ),
+                                      max_tasks_per_child)
+        if max_pending:
+            self.pending = threading.BoundedSemaphore(max_pending)
+        else:
+            self.pending = None
+
+    def release(self, result):
+        '''Callback called when job is finished or failed
+        '''
+        self.pending.release()
+
+    def submit(self, name, context):
+        '''Add job to render template with context specified. Returns
+        :class:`RenderResult`
+        '''
+        if self.pending is None:
+            return RenderResult(self.pool.apply_async(render_job,
+                                                      ((name, context), )))
+        self.pending.acquire()
+        try:
+            if sys.version_info[0] > 2:
+                return RenderResult(self.pool.apply_async(
+                        render_job, ((name, context), ), callback=self.release,
+                        error_callback=self.release))
+            return RenderResult(self.pool.apply_async(
+                    render_job, ((name, context), ), callback=self.release),
+                    self.release)
+        except Exception:
+            self.pending.release()
+            raise
+
+    def render(self, name, context):
+        '''Render template with context in worker process and wait for the
+        result
+        '''
+        return self.submit(name, context).get()
+
+    def map(self, jobs):
+        '''Render templates for iterable with pairs of template name and
+        context. Yields results in jobs order
+        '''
+        results = deque()
+        for name, context in jobs:
+            results.append(self.submit(name, context))
+            while results and results[0].ready():
+                yield results.popleft().get()
+        while results:
+            yield results.popleft().get()
+
+    def close(self):
+        '''Wait for all the jobs submitted and stop workers
+        '''
+        self.pool.close()
+        self.pool.join()
+
+    def terminate(self):
+        '''Stop workers without waiting for jobs
+        '''
+        self.pool.terminate()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, error_type, error, traceback):
+        if error_type is None:
+            self.close()
+        else:
+            self.terminate()
@@ -0,0 +1,161 @@
+"""Package provides template execution profiler
+"""
+import time
+
+from .tag import parse_token, tag_manager, VARIABLE
+
+try:
+    timer = time.perf_counter
+except AttributeError:
+    timer = time.time
+
+
+class Profiler(object):
+    '''Profiler collects execution time and number of calls for template
+    commands. Pass profiler to template execution to get profiled result::
+
+        profiler = Profiler()
+        for context in contexts:
+            template.execute(context, profiler=profiler)
+        print(profiler.report())
+
+    Statistics are grouped by frames. Frame is a tuple contains name of
+    template command was parsed in, line number, kind of command ('template',
+    'tag', 'filter', 'variable', 'block' or 'command') and tag name, filter
+    names or variable name. Profiler is not thread safe, so use different
+    profilers for concurrent executions.
+    '''
+
+    def __init__(self):
+        super(Profiler, self).__init__()
+        self.stats = {}
+        self.stacks = {}
+        self.stack = []
+        self.children = []
+
+    def execute(self, template, context):
+        '''Execute template with profiling
+        '''
+        frame = (template.name, None, 'template', template.name)
+        return self.wrap(frame, self.instrument(
+                template.commands, template, [template.name]))(context)
+
+    def wrap(self, frame, commands):
+        '''Create command executes commands and collects statistics for frame
+        '''
+        def profiled(context):
+            '''Execute commands and save the time spent
+            '''
+            self.stack.append(frame)
+            self.children.append(0)
+            start = timer()
+            try:
+                return ''.join([command(context) for command in commands])
+            finally:
+                elapsed = timer() - start
+                own = elapsed - self.children.pop()
+                self.record(tuple(self.stack), elapsed, own)
+                self.stack.pop()
+                if self.children:
+                    self.children[-1] += elapsed
+        return profiled
+
+    def record(self, stack, elapsed, own):
+        '''Save statistics for stack of frames
+        '''
+        stats = self.stats.get(stack[-1], None)
+        if stats is None:
+            self.stats[stack[-1]] = [1, elapsed, own]
+        else:
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] += own
+        self.stacks[stack] = self.stacks.get(stack, 0) + own
+
+    def instrument(self, commands, template, includes):
+        '''Create the list of profiled commands for commands from template.
+        includes is the list of names of templates being instrumented,
+        recursive include is profiled as single command
+        '''
+        from .template import Template, walk_include
+        result = []
+        for command in commands:
+            if isinstance(command, Template):
+                frame = (template.origin, None, 'block',
+                         command.block_name or command.name)
+                result.append(self.wrap(frame, self.instrument(
+                        command.commands, command, includes)))
+                continue
+            node = template.node(command)
+            position = template.position(command)
+            if position is None:
+                origin, line = template.origin, None
+            else:
+                origin, line = position[0:2]
+            if node is None:
+                result.append(self.wrap((origin, line, 'command', ''),
+                                        (command, )))
+            elif node[0] == Template.TEXT:
+                result.append(command)
+            elif node[0] == Template.ECHO:
+                result.append(self.wrap((origin, line, 'variable', node[1]),
+                                        (command, )))
+            elif node[0] == Template.FILTER:
+                names = '|'.join([name for name, _, _ in
+                                  Template.parse_filter(node[1])[1]])
+                result.append(self.wrap((origin, line, 'filter', names),
+                                        (command, )))
+            else:
+                name, token, block = node[1:4]
+                frame = (origin, line, 'tag', name)
+                tokens, types = parse_token(token)
+                included = None
+                if name == 'include' and types[0] != VARIABLE:
+                    # Profile commands of the template included
+                    included = walk_include(
+                            template.loader, tokens[0], includes,
+                            lambda target: self.wrap(
+                                (target.name, None, 'template', target.name),
+                                self.instrument(target.commands, target,
+                                                includes)))
+                if included is not None:
+                    command = included
+                elif block and tag_manager.is_lazy_tag(name):
+                    command = template.tag(name, token,
+                                           self.instrument(block, template,
+                                                           includes))
+                result.append(self.wrap(frame, (command, )))
+        return result
+
+    @staticmethod
+    def frame_name(frame):
+        '''Get the string representation of frame
+        '''
+        name, line, kind, value = frame
+        if line is not None:
+            name = '%s:%d' % (name, line)
+        if kind == 'template':
+            return name
+        return ('%s %s %s' % (name, kind, value)).rstrip()
+
+    def report(self, limit=20):
+        '''Get the text report with hot spots sorted by own time
+        '''
+        lines = ['%8s %12s %12s  %s' % ('calls', 'total, ms', 'own, ms',
+                                        'command')]
+        items = sorted(self.stats.items(), key=lambda item: -item[1][2])
+        for frame, (calls, total, own) in items[:limit]:
+            lines.append('%8d %12.3f %12.3f  %s' % (
+                    calls, total * 1000, own * 1000, self.frame_name(frame)))
+        return '\n'.join(lines)
+
+    def collapsed(self):
+        '''Get the profile in collapsed stacks format used by flamegraph
+        tools. Values are in microseconds
+        '''
+        lines = []
+        for stack, own in sorted(self.stacks.items()):
+            names = [self.frame_name(frame).replace(';', ',')
+                     for frame in stack]
+            lines.append('%s %d' % (';'.join(names), int(own * 1000000)))
+        return '\n'.join(lines)
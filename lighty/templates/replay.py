@@ -0,0 +1,259 @@
+"""Package provides capturing of production renders and replaying them
+against the current engine. Start recorder in production process to sample
+the renders into file::
+
+    from lighty.templates.replay import recorder
+
+    recorder.start('/var/tmp/renders.capture', rate=0.01)
+
+and replay the file captured to check the output is the same and get the
+latency and memory usage per template::
+
+    python -m lighty.templates.replay renders.capture templates/ --memory
+"""
+import argparse
+import pickle
+import random
+import sys
+import threading
+
+from .metrics import timer
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+class Recorder(object):
+    '''Recorder samples template executions with the name of template,
+    pickled context and result into file. Recording is disabled by default,
+    so execution only checks the flag. Renders with unpicklable contexts
+    are skipped and templates executed by other templates (like included
+    ones) are not recorded.
+    '''
+
+    def __init__(self):
+        super(Recorder, self).__init__()
+        self.enabled = False
+        self.rate = 1.0
+        self.max_records = None
+        self.records = 0
+        self.skipped = 0
+        self.stream = None
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def start(self, path, rate=1.0, max_records=None):
+        '''Start appending sampled renders into file. rate is the part of
+        renders recorded, recording stops after max_records renders
+        '''
+        with self.lock:
+            if self.stream is not None:
+                self.stream.close()
+            self.stream = open(path, 'ab')
+            self.rate = rate
+            self.max_records = max_records
+            self.records = 0
+            self.skipped = 0
+            self.enabled = True
+
+    def stop(self):
+        '''Stop recording and close the file
+        '''
+        with self.lock:
+            self.enabled = False
+            if self.stream is not None:
+                self.stream.close()
+                self.stream = None
+
+    def outermost(self):
+        '''Check is the current render not executed by another template
+        '''
+        return not getattr(self.local, 'active', False)
+
+    def sample(self):
+        '''Check should the current render be recorded
+        '''
+        return self.rate >= 1 or random.random() < self.rate
+
+    def execute(self, template, context, profiler=None, limits=None):
+        '''Execute outermost render and record it if it's sampled. Renders
+        of blocks and templates included are executed inside and never
+        sampled
+        '''
+        if not self.sample():
+            data = False
+        else:
+            try:
+                data = pickle.dumps(context, pickle.HIGHEST_PROTOCOL)
+            except Exception:
+                data = None
+        self.local.active = True
+        try:
+            result = template.execute(context, profiler, limits)
+        finally:
+            self.local.active = False
+        if data is False:
+            return result
+        if data is None:
+            with self.lock:
+                self.skipped += 1
+        else:
+            self.write(template.name, data, result)
+        return result
+
+    def write(self, name, data, result):
+        '''Append record into file
+        '''
+        with self.lock:
+            if self.stream is None:
+                return
+            pickle.dump((name, data, result), self.stream,
+                        pickle.HIGHEST_PROTOCOL)
+            self.stream.flush()
+            self.records += 1
+            if self.max_records is not None and \
+                    self.records >= self.max_records:
+                self.enabled = False
+                self.stream.close()
+                self.stream = None
+
+recorder = Recorder()
+
+
+def load_records(path):
+    '''Iterate over the records captured. Yields template name, context and
+    result rendered
+    '''
+    with open(path, 'rb') as stream:
+        while True:
+            try:
+                name, data, result = pickle.load(stream)
+            except EOFError:
+                return
+            yield name, pickle.loads(data), result
+
+
+def percentile(values, part):
+    '''Get percentile of sorted values
+    '''
+    if not values:
+        return 0
+    return values[min(len(values) - 1, int(len(values) * part))]
+
+
+class TemplateReplay(object):
+    '''Replay results for single template: render times in seconds, peak
+    memory allocated by render in bytes and number of renders with output
+    different from the output captured
+    '''
+
+    def __init__(self, name):
+        super(TemplateReplay, self).__init__()
+        self.name = name
+        self.times = []
+        self.memory = []
+        self.mismatches = 0
+
+    def summary(self):
+        '''Get the dict with renders count, mismatches count, time
+        percentiles and max memory used
+        '''
+        times = sorted(self.times)
+        return {
+            'renders': len(times),
+            'mismatches': self.mismatches,
+            'p50': percentile(times, 0.5),
+            'p90': percentile(times, 0.9),
+            'p99': percentile(times, 0.99),
+            'max': times[-1] if times else 0,
+            'memory': max(self.memory) if self.memory else None
+        }
+
+
+class ReplayReport(object):
+    '''Results of replay grouped by template name
+    '''
+
+    def __init__(self):
+        super(ReplayReport, self).__init__()
+        self.templates = {}
+        self.mismatches = []
+
+    def template(self, name):
+        '''Get results for template
+        '''
+        if name not in self.templates:
+            self.templates[name] = TemplateReplay(name)
+        return self.templates[name]
+
+    def format(self):
+        '''Get the table with results
+        '''
+        lines = ['%-32s %7s %6s %9s %9s %9s %10s' % (
+                'template', 'renders', 'diffs', 'p50 ms', 'p90 ms', 'p99 ms',
+                'memory')]
+        for name in sorted(self.templates):
+            summary = self.templates[name].summary()
+            memory = summary['memory']
+            lines.append('%-32s %7d %6d %9.3f %9.3f %9.3f %10s' % (
+                    name, summary['renders'], summary['mismatches'],
+                    summary['p50'] * 1000, summary['p90'] * 1000,
+                    summary['p99'] * 1000, '-' if memory is None else memory))
+        return '\n'.join(lines)
+
+
+def replay(loader, path, repeat=1, memory=False):
+    '''Render each record captured with templates from loader repeat times
+    and compare the results with the output captured. If memory is True,
+    peak memory allocated by each render is measured with tracemalloc in
+    additional untimed render. Returns :class:`ReplayReport`
+    '''
+    report = ReplayReport()
+    for index, (name, context, expected) in enumerate(load_records(path)):
+        template = loader.get_template(name)
+        results = report.template(name)
+        for _ in range(repeat):
+            start = timer()
+            result = template.execute(context)
+            results.times.append(timer() - start)
+        if result != expected:
+            results.mismatches += 1
+            report.mismatches.append(index)
+        if memory and tracemalloc is not None:
+            tracemalloc.start()
+            template.execute(context)
+            results.memory.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+    return report
+
+
+def main(args=None, output=None):
+    '''Command line interface. Replays the file captured with templates from
+    directories specified, prints the report and returns 1 if some output
+    differs from captured
+    '''
+    from .loaders import FSLoader
+    parser = argparse.ArgumentParser(
+            description='Replay template renders captured')
+    parser.add_argument('capture', help='file written by recorder')
+    parser.add_argument('dirs', nargs='+', help='templates directories')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='number of times each record is rendered')
+    parser.add_argument('--memory', action='store_true',
+                        help='measure peak memory used by renders')
+    options = parser.parse_args(args)
+    report = replay(FSLoader(options.dirs), options.capture, options.repeat,
+                    options.memory)
+    output = output or sys.stdout
+    output.write(report.format() + '\n')
+    if report.mismatches:
+        output.write('Output differs for records: %s\n' %
+                     ', '.join([str(index) for index in report.mismatches]))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
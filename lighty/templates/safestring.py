@@ -0,0 +1,59 @@
+"""Package provides HTML escaping and strings marked as safe for output
+"""
+from decimal import Decimal
+
+try:
+    from markupsafe import escape as markup_escape
+except ImportError:
+    markup_escape = None
+
+
+class SafeString(str):
+    '''String that was already escaped or that contains HTML code that
+    should be printed as is. Template does not escape such values::
+
+        >>> template = Template('{{ html }}', autoescape=True)
+        >>> template({'html': '<b>text</b>'})
+        '&lt;b&gt;text&lt;/b&gt;'
+        >>> template({'html': SafeString('<b>text</b>')})
+        '<b>text</b>'
+    '''
+    __slots__ = ()
+
+    def __html__(self):
+        '''Interface used by other libraries to get safe HTML string
+        '''
+        return self
+
+
+def mark_safe(value):
+    '''Mark value as safe string
+    '''
+    if isinstance(value, SafeString):
+        return value
+    return SafeString(value)
+
+
+# Types which string representation never contains HTML special characters
+SAFE_TYPES = frozenset((SafeString, int, float, Decimal, bool, type(None)))
+
+
+def escape_string(value):
+    '''Escape HTML special characters in string
+    '''
+    if markup_escape is not None:
+        return SafeString(markup_escape(value))
+    return SafeString(value.replace('&', '&amp;').replace('<', '&lt;')
+                           .replace('>', '&gt;').replace('"', '&#34;')
+                           .replace("'", '&#39;'))
+
+
+def escape(value):
+    '''Convert value into string and escape it if it's required
+    '''
+    value_type = type(value)
+    if value_type in SAFE_TYPES:
+        return value if value_type is SafeString else str(value)
+    if hasattr(value, '__html__'):
+        return mark_safe(value.__html__())
+    return escape_string(str(value))
@@ -2,6 +2,8 @@
 """
 import re
 
+from .metrics import stats
+
 VARIABLE = 0
 STRING = 1
 NUMBER = 2
@@ -69,8 +71,19 @@ class TagManager(object):
 
     def register(self, name, tag, is_block_tag=False, context_required=False,
                  template_required=False, loader_required=False,
-                 is_lazy_tag=True):
+                 is_lazy_tag=True, dependencies=None, partial=None):
         """Register new tag
+
+        dependencies is a function gets tag token and returns the list of
+        variable paths tag resolves from context and the list of variable
+        names tag sets for block contents. By default all the variables
+        passed to tag are treated as resolved from context.
+
+        partial is a function used for partial template execution. It gets
+        token, block contents, context, set of static variable names and
+        :class:`lighty.templates.template.Partial` instance and returns the
+        list of items to replace tag with or None if tag can't be partially
+        executed.
         """
         self.tags[name] = (
             tag,
@@ -78,7 +91,9 @@ class TagManager(object):
             context_required,
             template_required,
             loader_required,
-            is_lazy_tag
+            is_lazy_tag,
+            dependencies,
+            partial
         )
 
     def is_tag_exists(self, name):
@@ -100,10 +115,32 @@ class TagManager(object):
         """
         return self.is_tag_exists(name)[5]
 
+    def dependencies(self, name, token):
+        """Get the list of variable paths tag with token specified resolves
+        from context and the list of variable names it sets for block contents
+        """
+        tag = self.is_tag_exists(name)
+        if tag[6] is not None:
+            return tag[6](token)
+        tokens, token_types = parse_token(token)
+        return [value for value, value_type in zip(tokens, token_types)
+                if value_type == VARIABLE and value], ()
+
+    def partial(self, name, token, block_contents, context, static, partial):
+        """Partially execute tag. Returns None if tag does not support partial
+        execution
+        """
+        tag = self.is_tag_exists(name)
+        if tag[7] is None:
+            return None
+        return tag[7](token, block_contents, context, static, partial)
+
     def execute(self, name, token, context, block_contents, template, loader):
         """Execute tag
         """
         tag = self.is_tag_exists(name)
+        if stats.enabled:
+            stats.increment('tag_calls', name)
         args = {'token': token}
         if tag[1]:
             args['block_contents'] = block_contents
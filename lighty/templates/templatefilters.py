@@ -4,8 +4,14 @@ from decimal import Decimal, ROUND_DOWN, ROUND_HALF_UP
 import functools
 from operator import itemgetter
 import random as random_module
+import re
+try:
+    from urllib.parse import quote
+except ImportError:
+    from urllib import quote
 
 from .filter import filter_manager
+from . import safestring
 
 # Numbers
 
@@ -14,7 +20,7 @@ def summ(*args):
     '''Calculate the sum of all the values passed as args and
     '''
     return functools.reduce(lambda x, y: x + float(y), args)
-filter_manager.register(summ)
+filter_manager.register(summ, pure=True)
 
 
 def float_format_args_parse(func, raw_value, format_string):
@@ -61,7 +67,7 @@ def floatformat(raw_value, format_string='0'):
     result = do_float_format(value.copy_abs(), digits, ROUND_DOWN)
     result = str(result.copy_sign(value))
     return result.rstrip('0') if format_string[0] == '-' else result
-filter_manager.register(floatformat)
+filter_manager.register(floatformat, pure=True)
 
 
 def floatround(raw_value, format_string="0"):
@@ -78,7 +84,7 @@ def floatround(raw_value, format_string="0"):
     value, digits = float_format_args_parse('floatround', raw_value,
                                             format_string)
     return do_float_format(value, digits, ROUND_HALF_UP)
-filter_manager.register(floatround)
+filter_manager.register(floatround, pure=True)
 
 # Strings
 
@@ -87,14 +93,14 @@ def addslashes(value):
     '''Add a slashes to string
     '''
     return value.replace('\\', '\\\\').replace('"', '\\"').replace("'", "\\'")
-filter_manager.register(addslashes)
+filter_manager.register(addslashes, pure=True)
 
 
 def capfirst(value):
     '''Capitalizes the first character in string
     '''
     return value and value[0].upper() + value[1:]
-filter_manager.register(capfirst)
+filter_manager.register(capfirst, pure=True)
 
 
 def stringformat(value, format_string):
@@ -108,19 +114,144 @@ def stringformat(value, format_string):
     of Python string formatting
     """
     return ("%" + str(format_string)) % value
-filter_manager.register(stringformat)
+filter_manager.register(stringformat, pure=True)
+
+
+def safe(value):
+    '''Mark value as safe, so it would not be escaped by templates with
+    autoescape
+    '''
+    return safestring.mark_safe(value)
+filter_manager.register(safe, pure=True)
+
+
+def escape(value):
+    '''Escape HTML special characters. Result is marked as safe, so it is
+    not escaped again by templates with autoescape
+    '''
+    return safestring.mark_safe(safestring.escape(value))
+filter_manager.register(escape, pure=True)
+
+
+def keep_safe(value, result):
+    '''Mark result as safe if value was safe. Used by filters which never
+    add HTML special characters
+    '''
+    if isinstance(value, safestring.SafeString):
+        return safestring.SafeString(result)
+    return result
 
 
 def upper(value):
     '''Convert to upper case
     '''
-    return str(value).upper()
+    return keep_safe(value, str(value).upper())
+filter_manager.register(upper, pure=True)
 
 
 def lower(value):
     '''Convert to lower case
     '''
-    return str(value).lower()
+    return keep_safe(value, str(value).lower())
+filter_manager.register(lower, pure=True)
+
+
+def truncatechars(value, length):
+    '''Truncate string to length characters including the ellipsis
+
+    >>> truncatechars('Hello, world', '8')
+    'Hello...'
+    '''
+    value = str(value)
+    length = int(length)
+    if len(value) <= length:
+        return value
+    return value[:max(length - 3, 0)] + '...'
+filter_manager.register(truncatechars, pure=True)
+
+WORD = re.compile(r'\S+')
+
+
+def truncatewords(value, count):
+    '''Truncate string after count words. Only the words kept are searched,
+    so the rest of the string is not splitted
+
+    >>> truncatewords('Hello, big world', '2')
+    'Hello, big ...'
+    '''
+    value = str(value)
+    count = int(count)
+    end = 0
+    for index, match in enumerate(WORD.finditer(value)):
+        if index == count:
+            return value[:end] + ' ...'
+        end = match.end()
+    return value
+filter_manager.register(truncatewords, pure=True)
+
+
+def wordcount(value):
+    '''Get the number of words in string
+    '''
+    return len(str(value).split())
+filter_manager.register(wordcount, pure=True)
+
+
+def default(value, default_value):
+    '''Get default value if value is empty or None
+    '''
+    return value if value else default_value
+filter_manager.register(default, pure=True)
+
+
+def pluralize(value, suffix='s'):
+    '''Get plural suffix if value is not 1. Value can be a number, a string
+    contains number or a sequence. Suffix can contain singular and plural
+    forms separated with comma
+
+    >>> 'categor' + pluralize(2, 'y,ies')
+    'categories'
+    '''
+    if ',' in suffix:
+        singular, plural = suffix.split(',', 1)
+    else:
+        singular, plural = '', suffix
+    try:
+        number = Decimal(str(value))
+    except (ArithmeticError, ValueError):
+        try:
+            number = len(value)
+        except TypeError:
+            return plural
+    return singular if number == 1 else plural
+filter_manager.register(pluralize, pure=True)
+
+
+def urlencode(value, safe='/'):
+    '''Escape string to use it in URL
+    '''
+    value = str(value)
+    if not isinstance(value, bytes):
+        value = value.encode('utf-8')
+    return quote(value, safe)
+filter_manager.register(urlencode, pure=True)
+
+
+def filesizeformat(value):
+    '''Format number of bytes in human readable form
+
+    >>> filesizeformat(123456)
+    '120.6 KB'
+    '''
+    size = float(value)
+    if size < 1024:
+        return '%d %s' % (size, 'byte' if size == 1 else 'bytes')
+    for unit in ('KB', 'MB', 'GB', 'TB'):
+        size /= 1024
+        if size < 1024:
+            break
+    return '%.1f %s' % (size, unit)
+filter_manager.register(filesizeformat, pure=True)
 
 # Lists, dicts, strings
 
@@ -129,7 +260,7 @@ def dictsort(value, key, order=''):
     '''Sort dict
     '''
     return sorted(value, key=itemgetter(key), reverse=(order != ''))
-filter_manager.register(dictsort)
+filter_manager.register(dictsort, pure=True)
 
 
 def get(value, index):
@@ -138,14 +269,14 @@ def get(value, index):
     if issubclass(value.__class__, dict):
         return value[sorted(value.keys())[index]]
     return value[index]
-filter_manager.register(get)
+filter_manager.register(get, pure=True)
 
 
 def first(value):
     '''Get first item from list
     '''
     return get(value, 0)
-filter_manager.register(first)
+filter_manager.register(first, pure=True)
 
 
 def join(value, joiner):
@@ -155,34 +286,49 @@ def join(value, joiner):
     '1 2 3'
     '''
     return joiner.join([str(item) for item in value])
-filter_manager.register(join)
+filter_manager.register(join, pure=True)
 
 
 def last(value):
     '''Get last item from list
     '''
     return get(value, len(value) - 1)
-filter_manager.register(last)
+filter_manager.register(last, pure=True)
 
 
 def length(value):
     '''Return's the length of the string, dict or list
     '''
     return len(value)
+filter_manager.register(length, pure=True)
 
 
 def random(value):
     '''Get random item from list or dict
     '''
-    return get(value, random_module.random(len(value)))
+    return get(value, random_module.randrange(len(value)))
 filter_manager.register(random)
 
 
+def slice_filter(value, bounds):
+    '''Get the slice of list or string. Bounds uses Python slice syntax
+
+    >>> slice_filter([1, 2, 3, 4], '1:3')
+    [2, 3]
+    '''
+    parts = [int(part) if part.strip() else None
+             for part in bounds.split(':')]
+    if len(parts) == 1:
+        return value[:parts[0]]
+    return value[parts[0]:parts[1]:parts[2] if len(parts) > 2 else None]
+filter_manager.register(slice_filter, pure=True, name='slice')
+
+
 def sort(value, order=''):
     '''Sort list
     '''
     return sorted(value, reverse=(order != ''))
-filter_manager.register(sort)
+filter_manager.register(sort, pure=True)
 
 # Date and time
 
@@ -191,4 +337,4 @@ def date(value, format_string):
     '''Convert date into python format
     '''
     return value.strftime(format_string)
-filter_manager.register(date)
+filter_manager.register(date, pure=True)
@@ -5,32 +5,54 @@ import copy
 from functools import partial
 import itertools
 
-from .context import resolve
-from .tag import tag_manager, parse_token
-from .template import LazyTemplate, Template
+from .cache import cache_manager
+from .context import add_path, batch_load, resolve
+from .limits import LIMITS_KEY
+from .metrics import stats
+from .tag import tag_manager, parse_token, NUMBER, STRING, VARIABLE
+from .template import LazyBlock, LazyTemplate, Template, walk_include
 
 
 def exec_with_context(func, context=None, context_diff=None):
-    '''Execute function with context switching
+    '''Execute function with context switching. Function gets the copy of
+    context, so the context passed is never changed and can be shared
+    between threads
     '''
-    if not context:
-        context = {}
-    if not context_diff:
-        context_diff = {}
-    old_values = dict([(var_name,
-                        context[var_name] if var_name in context else None)
-                       for var_name in context_diff])
-    context.update(context_diff)
-    result = func(context)
-    context.update(old_values)
-    return result
+    context = dict(context) if context else {}
+    if context_diff:
+        context.update(context_diff)
+    return func(context)
 
 
 def exec_block(block_contents, context):
     '''Helper function that can be used in block tags to execute inner template
     code on a specified context
     '''
-    return "".join([command(context) for command in block_contents])
+    state = context.get(LIMITS_KEY, None)
+    if state is None:
+        return "".join([command(context) for command in block_contents])
+    return "".join(state.execute(block_contents, context))
+
+
+def bind(commands, values):
+    '''Create command executes commands on context updated with values
+    '''
+    def execute_bound(context):
+        '''Execute commands with values
+        '''
+        return exec_with_context(partial(exec_block, commands), context,
+                                 values)
+    return execute_bound
+
+
+def partial_bind(items, values, execution):
+    '''Get items of partial execution for block contents executed with values
+    set in context
+    '''
+    for item in items:
+        if callable(item):
+            return [bind(execution.join(items), values)]
+    return items
 
 
 def get_parent_blocks(template):
@@ -48,6 +70,9 @@ def get_parent_blocks(template):
 def find_command(command, template):
     '''Find command in commands list
     '''
+    if isinstance(template.commands, LazyBlock):
+        # Block bodies compiled on first use never contain the blocks
+        return None, template
     if command in template.commands:
         return template.commands.index(command), template
     else:
@@ -59,6 +84,23 @@ def find_command(command, template):
     return None, template
 
 
+def copy_commands(commands):
+    '''Copy commands list with the templates it contains. Templates are
+    copied to make it possible to replace blocks without parent template
+    modification, all the other commands are shared
+    '''
+    if isinstance(commands, LazyBlock):
+        return commands
+    result = []
+    for command in commands:
+        if isinstance(command, Template):
+            command = copy.copy(command)
+            command.commands = copy_commands(command.commands)
+            command.encoded = {}
+        result.append(command)
+    return result
+
+
 def replace_command(template, command, replacement):
     '''Search for command in commands list and replace it with a new one
     '''
@@ -117,8 +159,12 @@ def block(token, block_contents, template, loader):
         </html>
     """
     # Create inner template for blocks
-    tmpl = Template(name='blocks-' + token, loader=loader)
+    tmpl = Template(name='blocks-' + token, loader=loader, register=False)
+    tmpl.block_name = token
     tmpl.commands = block_contents
+    tmpl.nodes = template.nodes
+    tmpl.lines = template.lines
+    tmpl.origin = template.origin
 
     # Add template block into list
     if not hasattr(template, 'blocks'):
@@ -131,7 +177,7 @@ def block(token, block_contents, template, loader):
         return template.blocks[token]
     else:
         replace_command(template, template.parent.blocks[token], tmpl)
-        return lambda context: ''
+        return None
 
 tag_manager.register(
         name='block',
@@ -140,7 +186,8 @@ tag_manager.register(
         context_required=False,
         template_required=True,
         loader_required=True,
-        is_lazy_tag=False
+        is_lazy_tag=False,
+        dependencies=lambda token: ((), ())
 )
 
 
@@ -154,7 +201,7 @@ def extend(token, template, loader):
         template.blocks = get_parent_blocks(template).copy()
     else:
         template.blocks.update(get_parent_blocks(template).copy())
-    template.commands.extend(copy.deepcopy(template.parent.commands))
+    template.commands.extend(copy_commands(template.parent.commands))
     return None
 
 tag_manager.register(
@@ -162,7 +209,8 @@ tag_manager.register(
         tag=extend,
         template_required=True,
         loader_required=True,
-        is_lazy_tag=False
+        is_lazy_tag=False,
+        dependencies=lambda token: ((), ())
 )
 
 
@@ -184,7 +232,27 @@ def include(token, context, loader):
     '''
     tokens, _ = parse_token(token)
     template = loader.get_template(tokens[0])
-    return exec_with_context(template, context, {})
+    state = context.get(LIMITS_KEY, None)
+    if state is None:
+        return exec_with_context(template, context, {})
+    state.enter_include()
+    try:
+        return exec_with_context(template, context, {})
+    finally:
+        state.leave_include()
+
+
+def include_partial(token, block_contents, context, static, execution):
+    '''Inline the template included if it's name is constant. Recursive
+    includes are executed on render
+    '''
+    tokens, types = parse_token(token)
+    if types[0] == VARIABLE:
+        return None
+    return walk_include(execution.source.loader, tokens[0],
+                        execution.includes,
+                        lambda template: execution.commands(
+                            template.commands, context, static, template))
 
 tag_manager.register(
         name='include',
@@ -193,7 +261,8 @@ tag_manager.register(
         is_lazy_tag=True,
         context_required=True,
         template_required=False,
-        loader_required=True
+        loader_required=True,
+        partial=include_partial
 )
 
 
@@ -247,6 +316,29 @@ def with_tag(token, block_contents, context):
     return exec_with_context(partial(exec_block, block_contents), context,
                              {var_name: value})
 
+
+def with_dependencies(token):
+    '''Get variable resolved and variable set by with tag
+    '''
+    data_field, _, var_name = token.split(' ')
+    return (data_field, ), (var_name, )
+
+
+def with_partial(token, block_contents, context, static, execution):
+    '''Fold with tag if value is static
+    '''
+    data_field, _, var_name = token.split(' ')
+    if not execution.is_static(data_field, static):
+        return [execution.tag('with', token, execution.commands(
+                block_contents, context, static - frozenset((var_name, ))),
+                context, static)]
+    values = {var_name: resolve(data_field, context)}
+    block_context = dict(context)
+    block_context.update(values)
+    items = execution.commands(block_contents, block_context,
+                               static | frozenset(values))
+    return partial_bind(items, values, execution)
+
 tag_manager.register(
         name='with',
         tag=with_tag,
@@ -254,7 +346,9 @@ tag_manager.register(
         context_required=True,
         template_required=False,
         loader_required=False,
-        is_lazy_tag=True
+        is_lazy_tag=True,
+        dependencies=with_dependencies,
+        partial=with_partial
 )
 
 
@@ -281,6 +375,17 @@ def if_tag(token, block_contents, context):
         return exec_block(block_contents, context)
     return ''
 
+
+def if_partial(token, block_contents, context, static, execution):
+    '''Choose if tag branch if condition is static
+    '''
+    if not execution.is_static(token, static):
+        return [execution.tag('if', token, execution.commands(
+                block_contents, context, static), context, static)]
+    if resolve(token, context):
+        return execution.commands(block_contents, context, static)
+    return []
+
 tag_manager.register(
         name='if',
         tag=if_tag,
@@ -288,18 +393,51 @@ tag_manager.register(
         context_required=True,
         template_required=False,
         loader_required=False,
-        is_lazy_tag=True
+        is_lazy_tag=True,
+        dependencies=lambda token: ((token, ), ()),
+        partial=if_partial
 )
 
 
+def block_paths(commands, template, var_name):
+    '''Get variable paths commands resolve. Blocks where variable with
+    var_name is set are skipped
+    '''
+    for cmd in commands:
+        if isinstance(cmd, Template):
+            for path in block_paths(cmd.commands, cmd, var_name):
+                yield path
+            continue
+        node = template.node(cmd)
+        if node is None or node[0] == Template.TEXT:
+            continue
+        if node[0] == Template.ECHO:
+            yield node[1]
+        elif node[0] == Template.FILTER:
+            for path in Template.filter_paths(node[1]):
+                yield path
+        else:
+            paths, names = tag_manager.dependencies(node[1], node[2])
+            for path in paths:
+                yield path
+            if var_name not in names:
+                for path in block_paths(node[3], template, var_name):
+                    yield path
+
+
 class Forloop(object):
-    '''Class for executing block in loop with a context update
+    '''Class for executing block in loop with a context update. If loop
+    values support batch loading protocol (see
+    :func:`lighty.templates.context.batch_load`) fields loop body uses are
+    loaded for each window of iterations at once
     '''
+    window = 64
 
-    def __init__(self, var_name, values, block_contents):
+    def __init__(self, var_name, values, block_contents, template=None):
         self.var_name = var_name
         self.values = values
         self.block = block_contents
+        self.template = template
         self.counter0 = 0
 
     @property
@@ -326,15 +464,49 @@ class Forloop(object):
         '''
         return self.counter0 + 1
 
+    def fields(self):
+        '''Get the tree of loop variable fields loop body uses. Tree is
+        collected once for each loop block of template
+        '''
+        tree = self.template.loop_fields.get(id(self.block), None)
+        if tree is None:
+            tree = {}
+            prefix = self.var_name + '.'
+            for path in block_paths(self.block, self.template,
+                                    self.var_name):
+                if path.startswith(prefix):
+                    add_path(tree, path[len(prefix):])
+            self.template.loop_fields[id(self.block)] = tree
+        return tree
+
     def __call__(self, context):
         '''Get all the iterations joined
         '''
-        values = enumerate(self.values)
-        return "".join([exec_block(self.block, context)
-                        for self.counter0, context[self.var_name] in values])
-
-
-def for_tag(token, block_contents, context):
+        iterator = iter(self.values)
+        state = context.get(LIMITS_KEY, None)
+        if state is not None:
+            iterator = state.iterate(iterator)
+        window = list(itertools.islice(iterator, 1))
+        if (self.template is None or not window or
+                getattr(type(window[0]), '__batch_load__', None) is None):
+            values = enumerate(itertools.chain(window, iterator))
+            return "".join([exec_block(self.block, context) for
+                            self.counter0, context[self.var_name] in values])
+        window.extend(itertools.islice(iterator, self.window - 1))
+        tree = self.fields()
+        result = []
+        counter0 = 0
+        while window:
+            batch_load(window, tree)
+            for context[self.var_name] in window:
+                self.counter0 = counter0
+                result.append(exec_block(self.block, context))
+                counter0 += 1
+            window = list(itertools.islice(iterator, self.window))
+        return "".join(result)
+
+
+def for_tag(token, block_contents, context, template=None):
     """For tag used to make loops over all the iterator-like objects.
 
     Example::
@@ -374,15 +546,139 @@ def for_tag(token, block_contents, context):
     if not isinstance(values, collections.Iterable):
         raise ValueError('%s: "%s" is not iterable' % (data_field, values))
     # execute inline forloop
-    forloop = Forloop(var_name, values, block_contents)
+    forloop = Forloop(var_name, values, block_contents, template)
     return exec_with_context(forloop, context, {'forloop': forloop})
 
+
+def for_dependencies(token):
+    '''Get variable resolved and variables set by for tag
+    '''
+    var_name, _, data_field = token.split(' ')
+    return (data_field, ), (var_name, 'forloop')
+
+
+def for_partial(token, block_contents, context, static, execution):
+    '''Unroll for tag if sequence is static and short enough
+    '''
+    var_name, _, data_field = token.split(' ')
+    loop_names = frozenset((var_name, 'forloop'))
+    values = None
+    if execution.is_static(data_field, static):
+        values = resolve(data_field, context)
+    if not (isinstance(values, collections.Sized) and
+            isinstance(values, collections.Iterable) and
+            len(values) <= execution.max_unroll):
+        return [execution.tag('for', token, execution.commands(
+                block_contents, context, static - loop_names), context,
+                static)]
+    items = []
+    for counter0, value in enumerate(values):
+        forloop = Forloop(var_name, values, block_contents)
+        forloop.counter0 = counter0
+        loop_values = {var_name: value, 'forloop': forloop}
+        block_context = dict(context)
+        block_context.update(loop_values)
+        items.extend(partial_bind(
+                execution.commands(block_contents, block_context,
+                                   static | loop_names),
+                loop_values, execution))
+    return items
+
 tag_manager.register(
         name='for',
         tag=for_tag,
         is_block_tag=True,
         context_required=True,
+        template_required=True,
+        loader_required=False,
+        is_lazy_tag=True,
+        dependencies=for_dependencies,
+        partial=for_partial
+)
+
+
+def cache(token, block_contents, context):
+    """Cache tag stores the rendered block contents in the cache backend
+    configured with :data:`lighty.templates.cache.cache_manager`. First
+    argument is the fragment name, second is the number of seconds to keep
+    the result and all other arguments are the variables the result depends
+    on.
+
+    Example:
+
+    .. code-block:: html
+
+        {% cache "sidebar" 300 user.name %}
+            {% for item in menu %}<li>{{ item }}</li>{% endfor %}
+        {% endcache %}
+
+    renders the block once per 5 minutes for each user name. Variables
+    should be resolved into strings, numbers, booleans, None or tuples, so
+    pass the fields identify the objects like user.id, not the objects.
+    TypeError is raised for other values.
+    """
+    tokens, types = parse_token(token)
+    if len(tokens) < 2:
+        raise ValueError('cache tag requires fragment name and ttl: "%s"' %
+                         token)
+    values = [value if value_type == STRING or value_type == NUMBER
+              else resolve(value, context)
+              for value, value_type in zip(tokens, types)]
+    key = cache_manager.make_key(values[0], values[2:])
+    result = cache_manager.get(key)
+    if stats.enabled:
+        stats.increment('fragment_misses' if result is None
+                        else 'fragment_hits', values[0])
+    if result is None:
+        result = exec_block(block_contents, context)
+        cache_manager.set(key, result, float(values[1]))
+    return result
+
+tag_manager.register(
+        name='cache',
+        tag=cache,
+        is_block_tag=True,
+        context_required=True,
         template_required=False,
         loader_required=False,
         is_lazy_tag=True
 )
+
+
+def nocache(token, block_contents, context):
+    """Nocache tag marks the part of page rendered on each request. It's
+    executed as usual block, but partial execution never executes it, so
+    the page skeleton created with :func:`Template.partial` or
+    :func:`TemplateLoader.get_skeleton` contains all the page rendered
+    except the nocache blocks.
+
+    Example:
+
+    .. code-block:: html
+
+        <h1>{{ article.title }}</h1>
+        {% nocache %}Hello, {{ user.name }}!{% endnocache %}
+        <div>{{ article.text }}</div>
+
+    Skeleton created for article renders only the greeting for each user.
+    """
+    return exec_block(block_contents, context)
+
+
+def nocache_partial(token, block_contents, context, static, execution):
+    '''Keep the block contents to be executed on each request. Values bound
+    by outer tags are still passed to the block
+    '''
+    return [execution.tag('nocache', token, execution.commands(
+            block_contents, context, frozenset()), context, frozenset())]
+
+tag_manager.register(
+        name='nocache',
+        tag=nocache,
+        is_block_tag=True,
+        context_required=True,
+        template_required=False,
+        loader_required=False,
+        is_lazy_tag=True,
+        partial=nocache_partial
+)
@@ -7,4 +7,25 @@ tests = (
     'default_filters',
     'blockextend',
     'default_tags',
+    'partial',
+    'cache',
+    'memo',
+    'dependencies',
+    'autoescape',
+    'profiler',
+    'positions',
+    'metrics',
+    'batch',
+    'pool',
+    'threads',
+    'writer',
+    'batchload',
+    'lazy',
+    'limits',
+    'lazyblocks',
+    'freeze',
+    'fingerprint',
+    'analyzer',
+    'replay',
+    'formatters',
 )
@@ -0,0 +1,95 @@
+"""Test cases for templates static analyzer
+"""
+import io
+import unittest
+
+from lighty.templates.analyzer import Analyzer, main
+from lighty.templates.loaders import FSLoader, TemplateLoader
+from lighty.templates.template import Template
+
+
+class AnalyzerTestCase(unittest.TestCase):
+    """Test case for expensive constructs search
+    """
+
+    def setUp(self):
+        self.loader = TemplateLoader()
+        self.analyzer = Analyzer(loop_size=10, max_block_size=20)
+        Template('<li>{{ item }}</li>', loader=self.loader, name='row.html')
+
+    def findings(self, text, name='test.html'):
+        template = Template(text, loader=self.loader, name=name)
+        return [(finding.kind, finding.line, finding.column, finding.cost)
+                for finding in self.analyzer.analyze(template)]
+
+    def testIncludeInLoop(self):
+        '''Test include inside for loop'''
+        findings = self.findings('{% for item in items %}\n' +
+                                 '{% include "row.html" %}{% endfor %}')
+        assert findings == [('include-in-loop', 2, 1, 40)], (
+                'Wrong findings: %s' % findings)
+
+    def testRecursiveInclude(self):
+        '''Test template including itself inside for loop'''
+        template = FSLoader(['tests/templates']).get_template('menu.html')
+        findings = [(finding.kind, finding.line, finding.column, finding.cost)
+                    for finding in self.analyzer.analyze(template)]
+        assert findings == [('include-in-loop', 2, 34, 20)], (
+                'Wrong findings: %s' % findings)
+
+    def testFilters(self):
+        '''Test filters chains and sorting in loops'''
+        findings = self.findings(
+                '{% for a in b %}{% for c in d %}' +
+                '{{ c|lower|upper|capfirst }}{{ e|sort }}{% endfor %}' +
+                '{% endfor %}{{ f|get:1 }}')
+        assert findings == [('sort-in-loop', 1, 61, 1000),
+                            ('filter-chain', 1, 33, 300),
+                            ('dict-get', 1, 97, 10)], (
+                'Wrong findings: %s' % findings)
+
+    def testHugeBlock(self):
+        '''Test large blocks executed unconditionally'''
+        findings = self.findings('{% block a %}' + '{{ a }}<br>' * 30 +
+                                 '{% endblock %}{% block b %}{% if c %}' +
+                                 '{{ a }}<br>' * 30 + '{% endif %}' +
+                                 '{% endblock %}')
+        assert findings == [('huge-block', None, None, 60)], (
+                'Wrong findings: %s' % findings)
+
+    def testExtendChain(self):
+        '''Test deep templates inheritance'''
+        Template('{% block a %}{% endblock %}', loader=self.loader,
+                 name='level0.html')
+        for level in range(1, 5):
+            findings = self.findings(
+                    '{%% extend "level%d.html" %%}' % (level - 1),
+                    'level%d.html' % level)
+        assert findings == [('extend-chain', None, None, 4)], (
+                'Wrong findings: %s' % findings)
+
+    def testCommandLine(self):
+        '''Test command line interface'''
+        output = io.StringIO() if str is not bytes else io.BytesIO()
+        code = main(['tests/templates', '--min-cost', '1'], output)
+        assert code == 1, 'Wrong exit code: %s' % code
+        lines = output.getvalue().splitlines()
+        assert len(lines) == 1 and lines[0].startswith(
+                'menu.html:2:34: include-in-loop: recursive include'), (
+                'Wrong output: %s' % output.getvalue())
+        output = io.StringIO() if str is not bytes else io.BytesIO()
+        code = main(['tests/templates', '--min-cost', '21'], output)
+        assert code == 0, 'Wrong exit code: %s' % code
+        assert output.getvalue() == '', 'Wrong output: %s' % (
+                output.getvalue())
+
+
+def test():
+    suite = unittest.TestSuite()
+    suite.addTest(AnalyzerTestCase('testIncludeInLoop'))
+    suite.addTest(AnalyzerTestCase('testRecursiveInclude'))
+    suite.addTest(AnalyzerTestCase('testFilters'))
+    suite.addTest(AnalyzerTestCase('testHugeBlock'))
+    suite.addTest(AnalyzerTestCase('testExtendChain'))
+    suite.addTest(AnalyzerTestCase('testCommandLine'))
+    return suite
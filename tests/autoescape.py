@@ -0,0 +1,74 @@
+"""Test cases for HTML escaping
+"""
+import unittest
+
+from lighty.templates import Template
+from lighty.templates.safestring import escape, SafeString
+
+
+class EscapeTestCase(unittest.TestCase):
+    """Test case for escape function
+    """
+
+    def testEscape(self):
+        '''Test HTML special characters escaping'''
+        result = escape('<a href="/?a=1&b=\'2\'">')
+        right = '&lt;a href=&#34;/?a=1&amp;b=&#39;2&#39;&#34;&gt;'
+        assert result == right, 'Wrong escaping: %s' % result
+        assert isinstance(result, SafeString), 'Result is not safe string'
+
+    def testSafeValues(self):
+        '''Test safe values are not escaped'''
+        assert escape(SafeString('<b>')) == '<b>', 'Safe string escaped'
+        assert escape(10) == '10', 'Wrong number conversion'
+
+
+class AutoescapeTestCase(unittest.TestCase):
+    """Test case for templates with autoescape
+    """
+
+    def assertResult(self, template, context, right):
+        result = Template(template, autoescape=True)(context)
+        assert result == right, 'Wrong result: %s except %s' % (result, right)
+
+    def testVariable(self):
+        '''Test variable escaping'''
+        self.assertResult('<b>{{ a }}</b>', {'a': '<i>'}, '<b>&lt;i&gt;</b>')
+
+    def testFilter(self):
+        '''Test filter result escaping'''
+        self.assertResult('{{ a|capfirst }}', {'a': 'a & b'}, 'A &amp; b')
+
+    def testSafeFilter(self):
+        '''Test safe filter'''
+        self.assertResult('{{ a|safe }}', {'a': '<i>'}, '<i>')
+
+    def testEscapeFilter(self):
+        '''Test escape filter is not escaped twice'''
+        self.assertResult('{{ a|escape }}', {'a': '&'}, '&amp;')
+        result = Template('{{ a|escape }}')({'a': '&'})
+        assert result == '&amp;', 'Wrong escape filter result: %s' % result
+
+    def testEscapedFilterChain(self):
+        '''Test escape filter result is kept safe by case filters'''
+        self.assertResult('{{ a|escape|upper }}', {'a': '<i>'}, '&LT;I&GT;')
+        self.assertResult('{{ a|safe|lower }}', {'a': '<I>'}, '<i>')
+        self.assertResult('{{ a|escape|lower }}', {'a': 10}, '10')
+
+    def testNoAutoescape(self):
+        '''Test template without autoescape'''
+        result = Template('{{ a }}')({'a': '<i>'})
+        assert result == '<i>', 'Value was escaped: %s' % result
+
+
+def test():
+    suite = unittest.TestSuite()
+    suite.addTest(EscapeTestCase('testEscape'))
+    suite.addTest(EscapeTestCase('testSafeValues'))
+    suite.addTest(AutoescapeTestCase('testVariable'))
+    suite.addTest(AutoescapeTestCase('testFilter'))
+    suite.addTest(AutoescapeTestCase('testSafeFilter'))
+    suite.addTest(AutoescapeTestCase('testEscapeFilter'))
+    suite.addTest(AutoescapeTestCase('testEscapedFilterChain'))
+    suite.addTest(AutoescapeTestCase('testNoAutoescape'))
+    return suite
@@ -0,0 +1,87 @@
+"""Test cases for rendering template against many contexts
+"""
+import unittest
+
+from lighty.templates import batch
+from lighty.templates.template import Template
+
+
+class RenderManyTestCase(unittest.TestCase):
+    """Test case for Template.render_many
+    """
+
+    def setUp(self):
+        self.template = Template('{% for i in items %}{{ i }},{% endfor %}' +
+                                 '{{ name|capfirst }}', name='batch.html')
+        self.contexts = [{'items': range(i % 3), 'name': 'user%d' % i}
+                         for i in range(100)]
+        self.expected = [self.template.execute(context)
+                         for context in self.contexts]
+
+    def testGenerator(self):
+        '''Test render_many returns results in contexts order'''
+        result = list(self.template.render_many(iter(self.contexts)))
+        assert result == self.expected, 'Wrong render_many result: %s' % (
+                result[:3])
+
+    def testSink(self):
+        '''Test render_many writes results into sink'''
+        result = []
+        self.template.render_many(self.contexts, sink=result.append)
+        assert result == self.expected, 'Wrong results written to sink'
+
+    def testProcesses(self):
+        '''Test rendering in the pool of processes'''
+        result = list(self.template.render_many(self.contexts, processes=2,
+                                                chunk_size=7))
+        assert result == self.expected, 'Wrong results from processes'
+
+    def testUnordered(self):
+        '''Test rendering in the pool of processes without ordering'''
+        result = sorted(self.template.render_many(self.contexts, processes=2,
+                                                  ordered=False,
+                                                  chunk_size=7))
+        assert result == list(enumerate(self.expected)), (
+                'Wrong unordered results')
+
+    def testTemplateKept(self):
+        '''Test template is kept for workers until the pool is joined'''
+        results = self.template.render_many(self.contexts, processes=2,
+                                            chunk_size=7)
+        next(results)
+        assert list(batch.templates.values()) == [self.template], (
+                'Template was not kept for workers')
+        list(results)
+        assert batch.templates == {}, 'Template was not removed'
+
+    def testNoFork(self):
+        '''Test error raised where fork is not available'''
+        can_fork, batch.can_fork = batch.can_fork, False
+        try:
+            self.assertRaises(RuntimeError, self.template.render_many,
+                              self.contexts, processes=2)
+        finally:
+            batch.can_fork = can_fork
+
+    def testError(self):
+        '''Test error position saved'''
+        template = Template('{{ a }}\n{{ a.b.c }}', name='error.html')
+        try:
+            list(template.render_many([{'a': {'b': {'c': 1}}}, {'a': {}}]))
+        except LookupError as error:
+            assert error.template_position == ('error.html', 2, 1), (
+                    'Wrong error position: %s' % (error.template_position, ))
+        else:
+            assert False, 'Error was not raised'
+
+
+def test():
+    suite = unittest.TestSuite()
+    suite.addTest(RenderManyTestCase('testGenerator'))
+    suite.addTest(RenderManyTestCase('testSink'))
+    suite.addTest(RenderManyTestCase('testProcesses'))
+    suite.addTest(RenderManyTestCase('testUnordered'))
+    suite.addTest(RenderManyTestCase('testTemplateKept'))
+    suite.addTest(RenderManyTestCase('testNoFork'))
+    suite.addTest(RenderManyTestCase('testError'))
+    return suite
@@ -0,0 +1,119 @@
+"""Test cases for batch loading of loop values fields
+"""
+import unittest
+
+from lighty.templates import templatetags
+from lighty.templates.template import Template
+from lighty.templates.context import batch_load
+
+
+class User(object):
+    """User loaded by post
+    """
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+
+    @property
+    def name(self):
+        return 'user%d' % self.user_id
+
+
+class Post(object):
+    """Post loads owner lazily or with batch loading
+    """
+    queries = []
+
+    def __init__(self, post_id):
+        self.post_id = post_id
+        self.owner_id = post_id % 3
+
+    def __getattr__(self, name):
+        if name != 'owner':
+            raise AttributeError(name)
+        Post.queries.append([self.owner_id])
+        self.owner = User(self.owner_id)
+        return self.owner
+
+    @classmethod
+    def __batch_load__(cls, posts, field):
+        if field == 'owner':
+            cls.queries.append([post.owner_id for post in posts])
+            for post in posts:
+                post.owner = User(post.owner_id)
+
+
+class BatchLoadTestCase(unittest.TestCase):
+    """Test case for loading loop values fields with batches
+    """
+
+    def setUp(self):
+        Post.queries = []
+        self.posts = [Post(i) for i in range(100)]
+
+    def testForTag(self):
+        '''Test for tag loads fields loop body uses by windows'''
+        template = Template('{% for post in posts %}{% if post.post_id %}' +
+                            '{{ post.owner.name }},{% endif %}{% endfor %}')
+        result = template({'posts': self.posts})
+        expected = ''.join(['user%d,' % (i % 3) for i in range(1, 100)])
+        assert result == expected, 'Wrong result: %s' % result
+        assert len(Post.queries) == 2, 'Wrong number of queries: %d' % len(
+                Post.queries)
+        assert len(Post.queries[0]) == 64, 'Wrong window size'
+
+    def testFieldsCollectedOnce(self):
+        '''Test fields tree collected once for each loop of template'''
+        calls = []
+        block_paths = templatetags.block_paths
+
+        def counted(commands, template, var_name):
+            calls.append(var_name)
+            return block_paths(commands, template, var_name)
+        template = Template('{% for post in posts %}{{ post.owner.name }}' +
+                            '{% endfor %}')
+        templatetags.block_paths = counted
+        try:
+            for _ in range(3):
+                template({'posts': self.posts[:2]})
+        finally:
+            templatetags.block_paths = block_paths
+        assert calls == ['post'], 'Wrong fields collected: %s' % calls
+        assert len(Post.queries) == 3, 'Wrong number of queries: %d' % len(
+                Post.queries)
+
+    def testShadowed(self):
+        '''Test fields of loop variable overridden in inner block skipped'''
+        template = Template('{% for post in posts %}{% with post.post_id ' +
+                            'as post %}{{ post }}{% endwith %}{% endfor %}')
+        template({'posts': self.posts[:3]})
+        assert Post.queries == [], 'Wrong fields loaded: %s' % Post.queries
+
+    def testNested(self):
+        '''Test fields of loaded values loaded'''
+        loaded = []
+
+        class Owner(object):
+            @staticmethod
+            def __batch_load__(owners, field):
+                loaded.append((len(owners), field))
+
+        class Item(object):
+            def __init__(self):
+                self.owner = Owner()
+
+            @staticmethod
+            def __batch_load__(items, field):
+                loaded.append((len(items), field))
+        batch_load([Item(), Item(), {}], {'owner': {'name': {}}})
+        assert loaded == [(2, 'owner'), (2, 'name')], (
+                'Wrong fields loaded: %s' % loaded)
+
+
+def test():
+    suite = unittest.TestSuite()
+    suite.addTest(BatchLoadTestCase('testForTag'))
+    suite.addTest(BatchLoadTestCase('testFieldsCollectedOnce'))
+    suite.addTest(BatchLoadTestCase('testShadowed'))
+    suite.addTest(BatchLoadTestCase('testNested'))
+    return suite
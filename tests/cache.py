@@ -0,0 +1,109 @@
+"""Test cases for cache backends and cache template tag
+"""
+import shutil
+import tempfile
+import time
+import unittest
+
+from lighty.templates import Template
+from lighty.templates.cache import cache_manager, FileCache, LRUCache
+
+
+class LRUCacheTestCase(unittest.TestCase):
+    """Test case for in-process cache backend
+    """
+
+    def setUp(self):
+        self.cache = LRUCache(max_size=2)
+
+    def testGetSet(self):
+        '''Test getting value from cache'''
+        self.cache.set('a', 'value')
+        assert self.cache.get('a') == 'value', 'Wrong cached value'
+        assert self.cache.get('b') is None, 'Value for unknown key cached'
+
+    def testEviction(self):
+        '''Test least recently used value eviction'''
+        self.cache.set('a', '1')
+        self.cache.set('b', '2')
+        self.cache.get('a')
+        self.cache.set('c', '3')
+        assert self.cache.get('b') is None, 'Wrong value evicted'
+        assert self.cache.get('a') == '1', 'Recently used value evicted'
+        assert len(self.cache) == 2, 'Cache size exceeds max_size'
+
+    def testExpiration(self):
+        '''Test value expiration'''
+        self.cache.set('a', '1', 0.01)
+        time.sleep(0.02)
+        assert self.cache.get('a') is None, 'Expired value returned'
+
+
+class FileCacheTestCase(unittest.TestCase):
+    """Test case for file system cache backend
+    """
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.cache = FileCache(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def testGetSet(self):
+        '''Test getting value from file cache'''
+        self.cache.set('a', 'value')
+        assert FileCache(self.path).get('a') == 'value', 'Value not shared'
+        self.cache.delete('a')
+        assert self.cache.get('a') is None, 'Value was not deleted'
+
+    def testExpiration(self):
+        '''Test file cache value expiration'''
+        self.cache.set('a', '1', 0.01)
+        time.sleep(0.02)
+        assert self.cache.get('a') is None, 'Expired value returned'
+
+
+class CacheTagTestCase(unittest.TestCase):
+    """Test case for cache template tag
+    """
+
+    def setUp(self):
+        cache_manager.set_backend(LRUCache())
+        self.template = Template('{% cache "side" 60 user %}{{ counter }}' +
+                                 '{% endcache %}')
+
+    def testCachedResult(self):
+        '''Test cache tag returns cached result'''
+        result = self.template({'user': 'John', 'counter': 1})
+        assert result == '1', 'Wrong cache tag result: %s' % result
+        result = self.template({'user': 'John', 'counter': 2})
+        assert result == '1', 'Result was not cached: %s' % result
+
+    def testKeyVariables(self):
+        '''Test cache tag result depends on variables'''
+        self.template({'user': 'John', 'counter': 1})
+        result = self.template({'user': 'Peter', 'counter': 2})
+        assert result == '2', 'Result cached for wrong key: %s' % result
+
+    def testObjectKey(self):
+        '''Test objects are not used as cache key'''
+        self.assertRaises(TypeError, self.template,
+                          {'user': object(), 'counter': 1})
+        key = cache_manager.make_key('side', ['John', 1, None, (2.5, True)])
+        assert key == cache_manager.make_key('side', ('John', 1, None,
+                                                      (2.5, True))), (
+                'Wrong key: %s' % key)
+
+
+def test():
+    suite = unittest.TestSuite()
+    suite.addTest(LRUCacheTestCase('testGetSet'))
+    suite.addTest(LRUCacheTestCase('testEviction'))
+    suite.addTest(LRUCacheTestCase('testExpiration'))
+    suite.addTest(FileCacheTestCase('testGetSet'))
+    suite.addTest(FileCacheTestCase('testExpiration'))
+    suite.addTest(CacheTagTestCase('testCachedResult'))
+    suite.addTest(CacheTagTestCase('testKeyVariables'))
+    suite.addTest(CacheTagTestCase('testObjectKey'))
+    return suite
@@ -130,6 +130,74 @@ class DefaultFiltersTestCase(unittest.TestCase):
                            {'name': 'third', 'age': 11},
                            {'name': 'second', 'age': 10}])
 
+    def testRandom(self):
+        '''Test random template filter'''
+        value = [1, 2, 3]
+        result = templatefilters.random(value)
+        assert result in value, 'Wrong random item: %s' % result
+
+    def testSlice(self):
+        '''Test slice template filter'''
+        value = [1, 2, 3, 4]
+        self.assertResult('slice', templatefilters.slice_filter(value, '1:3'),
+                          [2, 3])
+        self.assertResult('slice', templatefilters.slice_filter(value, '2'),
+                          [1, 2])
+        self.assertResult('slice', templatefilters.slice_filter(value, '::-2'),
+                          [4, 2])
+
+    def testTruncateChars(self):
+        '''Test truncatechars template filter'''
+        result = templatefilters.truncatechars('Hello, world', '8')
+        self.assertResult('truncatechars', result, 'Hello...')
+        result = templatefilters.truncatechars('Hello', '8')
+        self.assertResult('truncatechars', result, 'Hello')
+
+    def testTruncateWords(self):
+        '''Test truncatewords template filter'''
+        result = templatefilters.truncatewords('Hello,  big world', '2')
+        self.assertResult('truncatewords', result, 'Hello,  big ...')
+        result = templatefilters.truncatewords('Hello world', '2')
+        self.assertResult('truncatewords', result, 'Hello world')
+
+    def testWordCount(self):
+        '''Test wordcount template filter'''
+        result = templatefilters.wordcount(' Hello,\n big world ')
+        self.assertResult('wordcount', result, 3)
+
+    def testDefault(self):
+        '''Test default template filter'''
+        self.assertResult('default', templatefilters.default('', 'a'), 'a')
+        self.assertResult('default', templatefilters.default('b', 'a'), 'b')
+
+    def testPluralize(self):
+        '''Test pluralize template filter'''
+        self.assertResult('pluralize', templatefilters.pluralize(1), '')
+        self.assertResult('pluralize', templatefilters.pluralize([1, 2]),
+                          's')
+        self.assertResult('pluralize', templatefilters.pluralize('1',
+                          'y,ies'), 'y')
+        self.assertResult('pluralize', templatefilters.pluralize(2, 'y,ies'),
+                          'ies')
+        self.assertResult('pluralize', templatefilters.pluralize('5'), 's')
+        self.assertResult('pluralize', templatefilters.pluralize(['a']), '')
+        self.assertResult('pluralize', templatefilters.pluralize(None), 's')
+
+    def testUrlencode(self):
+        '''Test urlencode template filter'''
+        result = templatefilters.urlencode('a b/c&d')
+        self.assertResult('urlencode', result, 'a%20b/c%26d')
+
+    def testFileSizeFormat(self):
+        '''Test filesizeformat template filter'''
+        self.assertResult('filesizeformat',
+                          templatefilters.filesizeformat(1), '1 byte')
+        self.assertResult('filesizeformat',
+                          templatefilters.filesizeformat(123456), '120.6 KB')
+        self.assertResult('filesizeformat',
+                          templatefilters.filesizeformat(3 * 1024 ** 3),
+                          '3.0 GB')
+
     # Date
 
     def testDate(self):
@@ -159,5 +227,14 @@ def test():
     suite.addTest(DefaultFiltersTestCase('testLast'))
     suite.addTest(DefaultFiltersTestCase('testSort'))
     suite.addTest(DefaultFiltersTestCase('testDictSort'))
+    suite.addTest(DefaultFiltersTestCase('testRandom'))
+    suite.addTest(DefaultFiltersTestCase('testSlice'))
+    suite.addTest(DefaultFiltersTestCase('testTruncateChars'))
+    suite.addTest(DefaultFiltersTestCase('testTruncateWords'))
+    suite.addTest(DefaultFiltersTestCase('testWordCount'))
+    suite.addTest(DefaultFiltersTestCase('testDefault'))
+    suite.addTest(DefaultFiltersTestCase('testPluralize'))
+    suite.addTest(DefaultFiltersTestCase('testUrlencode'))
+    suite.addTest(DefaultFiltersTestCase('testFileSizeFormat'))
     suite.addTest(DefaultFiltersTestCase('testDate'))
     return suite
@@ -0,0 +1,56 @@
+"""Test cases for template dependencies analysis
+"""
+import unittest
+
+from lighty.templates import Template
+from lighty.templates.loaders import FSLoader
+
+
+class DependenciesTestCase(unittest.TestCase):
+    """Test case for template dependencies report
+    """
+
+    def setUp(self):
+        self.loader = FSLoader(['tests/templates'])
+        self.report = self.loader.get_template('profile.html').dependencies()
+
+    def assertSet(self, name, result, value):
+        assert result == set(value), 'Wrong %s: %s except %s' % (
+                name, sorted(result), sorted(value))
+
+    def testVariables(self):
+        '''Test variables resolved by template'''
+        self.assertSet('variables', self.report.variables,
+                       ('user.name', 'items'))
+
+    def testLocalVariables(self):
+        '''Test variables set by tags are not reported'''
+        template = Template('{% with user.name as name %}{{ name }}' +
+                            '{{ title|argument:name }}{% endwith %}')
+        self.assertSet('variables', template.dependencies().variables,
+                       ('user.name', 'title'))
+
+    def testFiltersAndTags(self):
+        '''Test filters and tags used by template'''
+        self.assertSet('filters', self.report.filters, ('capfirst', ))
+        self.assertSet('tags', self.report.tags,
+                       ('extend', 'block', 'for', 'if', 'include'))
+
+    def testTemplates(self):
+        '''Test parent and included templates reports'''
+        assert self.report.parent.name == 'base.html', 'Wrong parent'
+        self.assertSet('includes', set(self.report.includes.keys()),
+                       ('simple.html', ))
+        self.assertSet('templates', self.report.templates(),
+                       ('profile.html', 'base.html', 'simple.html'))
+        self.assertSet('all variables', self.report.all_variables(),
+                       ('user.name', 'items', 'name'))
+
+
+def test():
+    suite = unittest.TestSuite()
+    suite.addTest(DependenciesTestCase('testVariables'))
+    suite.addTest(DependenciesTestCase('testLocalVariables'))
+    suite.addTest(DependenciesTestCase('testFiltersAndTags'))
+    suite.addTest(DependenciesTestCase('testTemplates'))
+    return suite
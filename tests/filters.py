@@ -83,6 +83,26 @@ class TemplateFiltersTestCase(unittest.TestCase):
         })
         self.assertResult(result, 'Hello, world')
 
+    def testConstantFolding(self):
+        '''Test pure filters applied to constants on parsing'''
+        template = Template('{{ "hello"|upper|slice:":4" }}')
+        node = template.node(template.commands[0])
+        assert node[0] == Template.TEXT, 'Filter was not folded: %s' % (
+                node, )
+        self.assertResult(template.execute(), 'HELL')
+        template = Template('{{ "hello"|simple_filter }}')
+        node = template.node(template.commands[0])
+        assert node[0] == Template.FILTER, 'Impure filter folded'
+        self.assertResult(template.execute(), 'HELLO')
+
+    def testPartialPureFilter(self):
+        '''Test partial execution keeps impure filters'''
+        template = Template('{{ a|upper }}{{ a|simple_filter }}')
+        result = template.partial({'a': 'x'})
+        assert len(result.commands) == 2, 'Impure filter was executed'
+        # Impure filter gets static value on execution
+        self.assertResult(result.execute({'a': 'y'}), 'XX')
+
 
 def test():
     suite = unittest.TestSuite()
@@ -93,4 +113,6 @@ def test():
     suite.addTest(TemplateFiltersTestCase('testMultiargFilter'))
     suite.addTest(TemplateFiltersTestCase('testMultiFilter'))
     suite.addTest(TemplateFiltersTestCase('testVaribaleArgFilter'))
+    suite.addTest(TemplateFiltersTestCase('testConstantFolding'))
+    suite.addTest(TemplateFiltersTestCase('testPartialPureFilter'))
     return suite
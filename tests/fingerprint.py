@@ -0,0 +1,88 @@
+"""Test cases for template fingerprints
+"""
+import unittest
+
+from lighty.templates.loaders import TemplateLoader
+from lighty.templates.template import Template
+
+
+class FingerprintTestCase(unittest.TestCase):
+    """Test case for Template.fingerprint
+    """
+
+    def setUp(self):
+        self.loader = TemplateLoader()
+        Template('<{% block a %}{{ title }}{% endblock %}>',
+                 loader=self.loader, name='parent.html')
+        Template('[{{ user.name }}]', loader=self.loader, name='user.html')
+        Template('({{ cart }})', loader=self.loader, name='cart.html')
+
+    def testValues(self):
+        '''Test fingerprint depends on values used only'''
+        template = Template('{{ a.b }}{% if c %}{{ d }}{% endif %}')
+        first = template.fingerprint({'a': {'b': 1}, 'c': True, 'd': 2})
+        second = template.fingerprint({'a': {'b': 1}, 'c': True, 'd': 2,
+                                       'e': 3})
+        assert first == second, 'Unused value changed fingerprint'
+        third = template.fingerprint({'a': {'b': 1}, 'c': True, 'd': 3})
+        assert first != third, 'Used value does not change fingerprint'
+
+    def testSource(self):
+        '''Test fingerprint depends on template source'''
+        context = {'a': 1}
+        first = Template('{{ a }}!').fingerprint(context)
+        second = Template('{{ a }}!').fingerprint(context)
+        assert first == second, 'Fingerprint is not stable'
+        third = Template('{{ a }}?').fingerprint(context)
+        assert first != third, 'Text does not change fingerprint'
+
+    def testInheritance(self):
+        '''Test fingerprint depends on parent and included templates'''
+        template = Template('{% extend "parent.html" %}{% block a %}' +
+                            '{% include "user.html" %}{% endblock %}',
+                            loader=self.loader, name='child.html')
+        context = {'title': 'T', 'user': {'name': 'Peter'}}
+        first = template.fingerprint(context)
+        context['user'] = {'name': 'John'}
+        second = template.fingerprint(context)
+        assert first != second, 'Included value does not change fingerprint'
+
+    def testDynamicInclude(self):
+        '''Test fingerprint of template included by name from context'''
+        template = Template('{% include widget %}', loader=self.loader,
+                            name='page.html')
+        first = template.fingerprint({'widget': 'user.html',
+                                      'user': {'name': 'Peter'}})
+        second = template.fingerprint({'widget': 'cart.html', 'cart': 1,
+                                       'user': {'name': 'Peter'}})
+        assert first != second, 'Included template is not taken into account'
+        third = template.fingerprint({'widget': 'cart.html', 'cart': 2})
+        assert second != third, 'Included value does not change fingerprint'
+        missing = template.fingerprint({})
+        assert missing is None, 'Wrong fingerprint: %s' % missing
+
+
+    def testLoopItems(self):
+        '''Test fingerprint depends on fields of loop items'''
+        template = Template('{% for i in items %}{{ i.title }}{% endfor %}')
+        items = [{'title': 'a'}, {'title': 'b'}]
+        first = template.fingerprint({'items': items})
+        items[0]['title'] = 'c'
+        second = template.fingerprint({'items': items})
+        assert first != second, 'Item field does not change fingerprint'
+
+    def testObjects(self):
+        '''Test no fingerprint for values without stable representation'''
+        result = Template('{{ a }}').fingerprint({'a': object()})
+        assert result is None, 'Wrong fingerprint: %s' % result
+
+
+def test():
+    suite = unittest.TestSuite()
+    suite.addTest(FingerprintTestCase('testValues'))
+    suite.addTest(FingerprintTestCase('testSource'))
+    suite.addTest(FingerprintTestCase('testInheritance'))
+    suite.addTest(FingerprintTestCase('testDynamicInclude'))
+    suite.addTest(FingerprintTestCase('testLoopItems'))
+    suite.addTest(FingerprintTestCase('testObjects'))
+    return suite
@@ -0,0 +1,72 @@
+"""Test cases for values formatters
+"""
+from decimal import Decimal
+import unittest
+
+from lighty.templates.formatter import FormatterManager, formatter_manager
+from lighty.templates.safestring import SafeString
+from lighty.templates.template import Template
+
+
+class Price(Decimal):
+    '''Decimal subclass used to test formatter lookup'''
+
+
+class FormattersTestCase(unittest.TestCase):
+    """Test case for values conversion into strings
+    """
+
+    def setUp(self):
+        self.formatters = formatter_manager.copy()
+        self.formatters.register(Decimal, lambda value: '%.2f' % value)
+
+    def testDefault(self):
+        '''Test values converted with str by default'''
+        template = Template('{{ a }} {{ b }} {{ c|floatround:1 }}')
+        result = template({'a': 'text', 'b': Decimal('1.5'), 'c': 2.25})
+        assert result == 'text 1.5 2.3', 'Wrong result: %s' % result
+
+    def testTemplateFormatters(self):
+        '''Test formatters specified for template'''
+        template = Template('{{ a }} {{ b }} {{ c|length }}',
+                            formatters=self.formatters)
+        result = template({'a': Decimal('1.5'), 'b': Price('2'),
+                           'c': [1, 2]})
+        assert result == '1.50 2.00 2', 'Wrong result: %s' % result
+        result = Template('{{ a }}')({'a': Decimal('1.5')})
+        assert result == '1.5', 'Default formatters changed: %s' % result
+
+    def testRegister(self):
+        '''Test formatter registered after template parsing'''
+        formatters = FormatterManager()
+        template = Template('{{ a }}', formatters=formatters)
+        assert template({'a': 1}) == '1', 'Wrong default result'
+        formatters.register(int, lambda value: '#%d' % value)
+        result = template({'a': 1})
+        assert result == '#1', 'Wrong result: %s' % result
+        result = template({'a': True})
+        assert result == '#1', 'Subclass is not formatted: %s' % result
+        formatters.unregister(int)
+        result = template({'a': 1})
+        assert result == '1', 'Wrong result: %s' % result
+
+    def testAutoescape(self):
+        '''Test formatters results are escaped'''
+        formatters = FormatterManager()
+        formatters.register(int, lambda value: '<%d>' % value)
+        formatters.register(float, lambda value: SafeString('<b>%s</b>' %
+                                                            value))
+        template = Template('{{ a }}{{ b }}{{ c }}', autoescape=True,
+                            formatters=formatters)
+        result = template({'a': 1, 'b': 0.5, 'c': '<i>'})
+        assert result == '&lt;1&gt;<b>0.5</b>&lt;i&gt;', (
+                'Wrong result: %s' % result)
+
+
+def test():
+    suite = unittest.TestSuite()
+    suite.addTest(FormattersTestCase('testDefault'))
+    suite.addTest(FormattersTestCase('testTemplateFormatters'))
+    suite.addTest(FormattersTestCase('testRegister'))
+    suite.addTest(FormattersTestCase('testAutoescape'))
+    return suite
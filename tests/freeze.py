@@ -0,0 +1,57 @@
+"""Test cases for templates prepared to be shared by forked processes
+"""
+import gc
+import unittest
+
+from lighty.templates.loaders import FSLoader, TemplateLoader
+from lighty.templates.template import Template
+
+
+class FreezeTestCase(unittest.TestCase):
+    """Test case for loader and template freeze
+    """
+
+    def tearDown(self):
+        if hasattr(gc, 'unfreeze'):
+            gc.unfreeze()
+
+    def testLoader(self):
+        '''Test frozen templates give the same results'''
+        loader = FSLoader(['tests/templates'], lazy_blocks=True)
+        names = ('index.html', 'base.html', 'simple.html')
+        context = {'name': 'world'}
+        expected = [FSLoader(['tests/templates']).get_template(name)(context)
+                    for name in names]
+        loader.freeze()
+        for name, value in zip(names, expected):
+            template = loader.get_template(name)
+            assert isinstance(template.commands, tuple), (
+                    'Commands of %s are not frozen' % name)
+            result = template(context)
+            assert result == value, 'Wrong result: %s' % result
+            result = bytearray()
+            template.render_to(result, context)
+            assert result == value.encode('utf-8'), (
+                    'Wrong encoded result: %s' % result)
+        if hasattr(gc, 'get_freeze_count'):
+            assert gc.get_freeze_count() > 0, 'Objects were not frozen'
+
+    def testExtendFrozen(self):
+        '''Test child template extends the parent template already frozen'''
+        loader = TemplateLoader()
+        Template('<{% block a %}A{% endblock %}{% if b %}B{% endif %}>',
+                 loader=loader, name='parent.html', lazy_blocks=True)
+        loader.freeze()
+        child = Template('{% extend "parent.html" %}{% block a %}C' +
+                         '{% endblock %}', loader=loader, name='child.html')
+        result = child({'b': True})
+        assert result == '<CB>', 'Wrong result: %s' % result
+        result = loader.get_template('parent.html')({'b': False})
+        assert result == '<A>', 'Wrong result: %s' % result
+
+
+def test():
+    suite = unittest.TestSuite()
+    suite.addTest(FreezeTestCase('testLoader'))
+    suite.addTest(FreezeTestCase('testExtendFrozen'))
+    return suite
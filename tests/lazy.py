@@ -0,0 +1,49 @@
+"""Test cases for lazy context values
+"""
+import unittest
+
+from lighty.templates.context import Lazy
+from lighty.templates.template import Template
+
+
+class LazyTestCase(unittest.TestCase):
+    """Test case for values calculated on first use
+    """
+
+    def setUp(self):
+        self.calls = []
+
+    def value(self, name):
+        self.calls.append(name)
+        return {'name': name}
+
+    def testSkipped(self):
+        '''Test lazy value not used is not calculated'''
+        template = Template('{% if show %}{{ user.name }}{% endif %}')
+        result = template({'show': False, 'user': Lazy(self.value, 'John')})
+        assert result == '', 'Wrong result: %s' % result
+        assert self.calls == [], 'Lazy value was calculated'
+
+    def testMemoized(self):
+        '''Test lazy value calculated once'''
+        template = Template('{% for i in items %}{{ user.name }}{% endfor %}' +
+                            '{{ user.name|capfirst }}{{ user }}')
+        result = template({'items': [1, 2], 'user': Lazy(self.value, 'john')})
+        assert result == "johnjohnJohn{'name': 'john'}", (
+                'Wrong result: %s' % result)
+        assert self.calls == ['john'], 'Wrong calls: %s' % self.calls
+
+    def testField(self):
+        '''Test lazy value in object field and filter argument'''
+        template = Template('{{ user.profile.name }} {{ a|join:sep }}')
+        result = template({'user': {'profile': Lazy(self.value, 'Peter')},
+                           'a': ['a', 'b'], 'sep': Lazy(lambda: ', ')})
+        assert result == 'Peter a, b', 'Wrong result: %s' % result
+
+
+def test():
+    suite = unittest.TestSuite()
+    suite.addTest(LazyTestCase('testSkipped'))
+    suite.addTest(LazyTestCase('testMemoized'))
+    suite.addTest(LazyTestCase('testField'))
+    return suite
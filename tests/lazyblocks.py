@@ -0,0 +1,105 @@
+"""Test cases for block bodies compiled on first use
+"""
+import threading
+import unittest
+
+from lighty.templates.loaders import TemplateLoader
+from lighty.templates.template import Template, TemplateSyntaxError
+
+
+class LazyBlocksTestCase(unittest.TestCase):
+    """Test case for lazy_blocks template option
+    """
+
+    def testNotCompiled(self):
+        '''Test branch not executed is not compiled'''
+        template = Template('{% if a %}{{ b }}{% endif %}{% if c %}' +
+                            '{{ d }}{% endif %}', lazy_blocks=True)
+        result = template({'a': True, 'b': 'B', 'c': False})
+        assert result == 'B', 'Wrong result: %s' % result
+        usage = template.block_usage()
+        assert usage == [('if', 1, 1, 1), ('if', 1, 29, 0)], (
+                'Wrong usage: %s' % usage)
+        template({'a': True, 'b': 'B', 'c': False})
+        assert template.block_usage()[0][3] == 1, 'Block compiled twice'
+
+    def testNested(self):
+        '''Test nested blocks compiled on first use give the same result'''
+        source = ('{% for i in items %}{% if i %}{{ i }}{% endif %}-' +
+                  '{% endfor %}{% with a as x %}{{ x }}{% endwith %}')
+        context = {'items': [1, 0, 2], 'a': 'A'}
+        expected = Template(source)(context)
+        template = Template(source, lazy_blocks=True)
+        result = template(context)
+        assert result == expected, 'Wrong result: %s' % result
+        assert len(template.block_usage()) == 3, (
+                'Wrong usage: %s' % template.block_usage())
+
+    def testInheritance(self):
+        '''Test lazy blocks in parent and child templates'''
+        loader = TemplateLoader()
+        Template('<{% block a %}{{ x }}{% endblock %}' +
+                 '{% block b %}{% if y %}B{% endif %}{% endblock %}>',
+                 loader=loader, name='parent.html', lazy_blocks=True)
+        child = Template('{% extend "parent.html" %}{% block a %}{{ z }}' +
+                         '{% endblock %}', loader=loader, name='child.html',
+                         lazy_blocks=True)
+        result = child({'z': 'Z', 'y': True})
+        assert result == '<ZB>', 'Wrong result: %s' % result
+        parent = loader.get_template('parent.html')
+        assert parent.block_usage()[0][3] == 0, 'Overridden block compiled'
+
+    def testDependencies(self):
+        '''Test dependencies include the blocks not compiled yet'''
+        template = Template('{% if a %}{{ b.c }}{% endif %}',
+                            lazy_blocks=True)
+        paths = template.paths()
+        assert paths == set(['a', 'b.c']), 'Wrong paths: %s' % paths
+
+    def testThreads(self):
+        '''Test blocks compiled from concurrent threads'''
+        source = ''.join(['{%% if a%d %%}{{ b%d }}{%% endif %%}' % (i, i)
+                          for i in range(50)])
+        template = Template(source, lazy_blocks=True)
+        locks = set([id(block.lock) for block in template.spans])
+        assert len(locks) == 1, 'Blocks are compiled under different locks'
+        errors = []
+
+        def render(index):
+            try:
+                template({'a%d' % index: True, 'b%d' % index: index})
+                template.dependencies()
+            except Exception as error:
+                errors.append(error)
+        threads = [threading.Thread(target=render, args=(index, ))
+                   for index in range(50)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == [], 'Errors raised: %s' % errors
+        assert len(template.paths()) == 100, 'Wrong paths: %s' % (
+                template.paths(), )
+
+    def testSyntaxError(self):
+        '''Test syntax error in lazy block reported on execution'''
+        template = Template('{% if a %}\n  {{ b }x{% endif %}',
+                            name='error.html', lazy_blocks=True)
+        try:
+            template({'a': True})
+        except TemplateSyntaxError as error:
+            assert (error.line, error.column) == (2, 9), (
+                    'Wrong position: %s' % error)
+        else:
+            self.fail('Syntax error was not raised')
+
+
+def test():
+    suite = unittest.TestSuite()
+    suite.addTest(LazyBlocksTestCase('testNotCompiled'))
+    suite.addTest(LazyBlocksTestCase('testNested'))
+    suite.addTest(LazyBlocksTestCase('testInheritance'))
+    suite.addTest(LazyBlocksTestCase('testDependencies'))
+    suite.addTest(LazyBlocksTestCase('testThreads'))
+    suite.addTest(LazyBlocksTestCase('testSyntaxError'))
+    return suite
@@ -0,0 +1,103 @@
+"""Test cases for template execution limits
+"""
+import time
+import unittest
+
+from lighty.templates.filter import filter_manager
+from lighty.templates.limits import RenderLimits, RenderLimitExceeded
+from lighty.templates.loaders import TemplateLoader
+from lighty.templates.template import Template
+
+
+def slow(value):
+    time.sleep(0.01)
+    return value
+filter_manager.register(slow)
+
+
+class LimitsTestCase(unittest.TestCase):
+    """Test case for render limits
+    """
+
+    def assertExceeded(self, template, context, limits, name):
+        try:
+            template.execute(context, limits=limits)
+        except RenderLimitExceeded as error:
+            assert error.limit == name, 'Wrong limit exceeded: %s' % (
+                    error.limit)
+        else:
+            assert False, 'Limit %s was not exceeded' % name
+
+    def testIterations(self):
+        '''Test nested loops iterations counted'''
+        template = Template('{% for a in items %}{% for b in items %}{{ b }}' +
+                            '{% endfor %}{% endfor %}')
+        context = {'items': range(10)}
+        result = template.execute(context,
+                                  limits=RenderLimits(max_iterations=110))
+        assert len(result) == 100, 'Wrong result: %s' % result
+        self.assertExceeded(template, context,
+                            RenderLimits(max_iterations=50),
+                            'max_iterations')
+
+    def testOutput(self):
+        '''Test output size limit'''
+        template = Template('{{ a }}{{ a }}')
+        limits = RenderLimits(max_output=15)
+        result = template.execute({'a': 'x' * 5}, limits=limits)
+        assert result == 'x' * 10, 'Wrong result: %s' % result
+        self.assertExceeded(template, {'a': 'x' * 10}, limits, 'max_output')
+
+    def testLoopOutput(self):
+        '''Test output size limit stops single loop'''
+        calls = []
+
+        def count(value):
+            calls.append(value)
+            return value
+        filter_manager.register(count)
+        template = Template('{% for a in items %}{{ a|count }}{% endfor %}')
+        self.assertExceeded(template, {'items': ['x' * 10] * 100},
+                            RenderLimits(max_output=25), 'max_output')
+        assert len(calls) == 3, 'Loop was not stopped: %d' % len(calls)
+
+    def testOutputBytes(self):
+        '''Test output size counted in bytes'''
+        template = Template('{% if a %}{{ a }}{% endif %}')
+        limits = RenderLimits(max_output=5)
+        result = template.execute({'a': 'abc'}, limits=limits)
+        assert result == 'abc', 'Wrong result: %s' % result
+        self.assertExceeded(template, {'a': '\u0444' * 3}, limits,
+                            'max_output')
+
+    def testIncludeDepth(self):
+        '''Test recursive include stopped'''
+        loader = TemplateLoader()
+        template = Template('a{% include "recursive.html" %}', loader=loader,
+                            name='recursive.html')
+        self.assertExceeded(template, {}, RenderLimits(max_include_depth=3),
+                            'max_include_depth')
+
+    def testTimeout(self):
+        '''Test execution deadline'''
+        template = Template('{% for a in items %}{{ a|slow }}{% endfor %}')
+        self.assertExceeded(template, {'items': range(100)},
+                            RenderLimits(timeout=0.05), 'timeout')
+
+    def testContext(self):
+        '''Test context passed is not changed'''
+        context = {'a': 1}
+        Template('{{ a }}').execute(context, limits=RenderLimits())
+        assert context == {'a': 1}, 'Context changed: %s' % context
+
+
+def test():
+    suite = unittest.TestSuite()
+    suite.addTest(LimitsTestCase('testIterations'))
+    suite.addTest(LimitsTestCase('testOutput'))
+    suite.addTest(LimitsTestCase('testLoopOutput'))
+    suite.addTest(LimitsTestCase('testOutputBytes'))
+    suite.addTest(LimitsTestCase('testIncludeDepth'))
+    suite.addTest(LimitsTestCase('testTimeout'))
+    suite.addTest(LimitsTestCase('testContext'))
+    return suite
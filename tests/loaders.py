@@ -59,8 +59,37 @@ class ExtendTestCase(BlockTestCase):
                       "\n".join((result, "except", EXTEND_RESULT)))
 
 
+class VariantTestCase(unittest.TestCase):
+    """Test case for templates specialized for static variables
+    """
+
+    def setUp(self):
+        self.loader = FSLoader(['tests/templates'], max_variants=2)
+
+    def testVariantExecution(self):
+        '''Test specialized template execution'''
+        variant = self.loader.get_variant('simple.html', {'name': 'John'})
+        result = variant({}).strip()
+        assert result == 'Hello, John', 'Wrong variant result: %s' % result
+        assert len(variant.commands) == 1, 'Variant was not specialized'
+
+    def testVariantsCache(self):
+        '''Test variants caching'''
+        first = self.loader.get_variant('simple.html', {'name': 'John'})
+        second = self.loader.get_variant('simple.html', {'name': 'John'})
+        assert first is second, 'Variant was not cached'
+        other = self.loader.get_variant('simple.html', {'name': 'Peter'})
+        assert other is not first, 'Wrong variant returned'
+        assert first.name not in self.loader.templates, (
+                'Variant registered as template')
+        self.loader.get_variant('simple.html', {'name': 'Jane'})
+        assert len(self.loader.variants) == 2, 'Variants cache is unbounded'
+
+
 def test():
     suite = unittest.TestSuite()
     suite.addTest(BlockTestCase('testExecuteTemplate'))
     suite.addTest(ExtendTestCase("testExecuteTemplate"))
+    suite.addTest(VariantTestCase("testVariantExecution"))
+    suite.addTest(VariantTestCase("testVariantsCache"))
     return suite
@@ -0,0 +1,118 @@
+"""Test cases for template execution results memoization
+"""
+import unittest
+
+from lighty.templates import Template
+from lighty.templates.filter import filter_manager
+from lighty.templates.loaders import FSLoader
+
+
+class Counter(object):
+    '''Value counts how many times it was rendered
+    '''
+
+    def __init__(self):
+        self.count = 0
+
+    def __str__(self):
+        self.count += 1
+        return str(self.count)
+
+    def __repr__(self):
+        return 'Counter'
+
+
+calls = []
+
+
+def counted(value):
+    calls.append(value)
+    return value
+filter_manager.register(counted)
+
+
+class MemoTestCase(unittest.TestCase):
+    """Test case for template memoization
+    """
+
+    def testInferredKeys(self):
+        '''Test memoization keys inferred from template'''
+        template = Template('{% if user.active %}{{ user.name|upper }}' +
+                            '{% endif %}{{ counter }}').memoize()
+        assert template.memo_keys == ('counter', 'user.active', 'user.name'), (
+                'Wrong memoization keys: %s' % (template.memo_keys, ))
+
+    def testIncludedKeys(self):
+        '''Test memoization keys include paths from included template'''
+        template = Template('{% include "simple.html" %}', name="memo.html",
+                            loader=FSLoader(['tests/templates']))
+        template.memoize()
+        assert template.memo_keys == ('name', ), 'Wrong keys: %s' % (
+                template.memo_keys, )
+
+    def setUp(self):
+        del calls[:]
+
+    def testMemoizedExecution(self):
+        '''Test memoized template skips commands execution'''
+        template = Template('{{ name|counted }}').memoize()
+        result = template({'name': 'Peter'})
+        assert result == 'Peter', 'Wrong result: %s' % result
+        result = template({'name': 'Peter', 'other': 'value'})
+        assert result == 'Peter', 'Wrong memoized result: %s' % result
+        assert len(calls) == 1, 'Result was not memoized'
+        result = template({'name': 'John'})
+        assert result == 'John', 'Wrong memoized result: %s' % result
+
+    def testLoopKeys(self):
+        '''Test memoization keys contain loop variable fields'''
+        template = Template('{% for i in items %}{{ i.title|counted }}' +
+                            '{% endfor %}{% for i in other %}.' +
+                            '{% endfor %}').memoize()
+        assert template.memo_keys == ('items.*.title', 'other.*'), (
+                'Wrong keys: %s' % (template.memo_keys, ))
+        items = [{'title': 'a'}, {'title': 'b'}]
+        template({'items': items, 'other': [1]})
+        items[0]['title'] = 'c'
+        result = template({'items': items, 'other': [1]})
+        assert result == 'cb.', 'Wrong memoized result: %s' % result
+
+    def testObjectKeys(self):
+        '''Test executions with objects as keys are not memoized'''
+        template = Template('{{ user|counted }}').memoize()
+        template({'user': Counter()})
+        template({'user': Counter()})
+        assert len(calls) == 2, 'Result memoized for object'
+
+    def testUnknownKeys(self):
+        '''Test keys are not inferred for recursive templates'''
+        template = FSLoader(['tests/templates']).get_template('menu.html')
+        self.assertRaises(ValueError, template.memoize)
+
+    def testLazyTemplateKeys(self):
+        '''Test keys inferred for template loaded lazily'''
+        template = FSLoader(['tests/templates']).get_template('simple.html')
+        paths = template.key_paths()
+        assert paths == (set(['name']), set()), 'Wrong keys: %s' % (
+                paths, )
+
+    def testExplicitKeys(self):
+        '''Test memoization with keys specified'''
+        template = Template('{{ name }}: {{ counter }}').memoize(['name'])
+        counter = Counter()
+        template({'name': 'Peter', 'counter': counter})
+        result = template({'name': 'Peter', 'counter': 'other'})
+        assert result == 'Peter: 1', 'Result was not memoized: %s' % result
+
+
+def test():
+    suite = unittest.TestSuite()
+    suite.addTest(MemoTestCase('testInferredKeys'))
+    suite.addTest(MemoTestCase('testIncludedKeys'))
+    suite.addTest(MemoTestCase('testMemoizedExecution'))
+    suite.addTest(MemoTestCase('testExplicitKeys'))
+    suite.addTest(MemoTestCase('testLoopKeys'))
+    suite.addTest(MemoTestCase('testObjectKeys'))
+    suite.addTest(MemoTestCase('testUnknownKeys'))
+    suite.addTest(MemoTestCase('testLazyTemplateKeys'))
+    return suite
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""Test cases for render metrics
+"""
+import threading
+import unittest
+
+from lighty.templates.template import Template
+from lighty.templates.loaders import FSLoader, TemplateLoader
+from lighty.templates.metrics import Histogram, stats
+
+
+class HistogramTestCase(unittest.TestCase):
+    """Test case for histogram
+    """
+
+    def testObserve(self):
+        '''Test values counted in buckets'''
+        histogram = Histogram((1, 10))
+        for value in (0.5, 1, 5, 20):
+            histogram.observe(value)
+        result = histogram.snapshot()
+        assert result['count'] == 4, 'Wrong count: %s' % result['count']
+        assert result['sum'] == 26.5, 'Wrong sum: %s' % result['sum']
+        assert result['buckets'] == [(1, 2), (10, 1), (float('inf'), 1)], (
+                'Wrong buckets: %s' % result['buckets'])
+
+
+class MetricsTestCase(unittest.TestCase):
+    """Test case for metrics collected on template rendering
+    """
+
+    def setUp(self):
+        stats.reset()
+        stats.enable()
+
+    def tearDown(self):
+        stats.enable(False)
+        stats.reset()
+
+    def assertCounter(self, metric, key, value):
+        counters = stats.snapshot()['counters']
+        result = counters.get(metric, {}).get(key, None)
+        assert result == value, 'Wrong %s for %s: %s except %s' % (
+                metric, key, result, value)
+
+    def testRender(self):
+        '''Test renders, size and tags calls counted'''
+        template = Template('{% if a %}{{ a|capfirst }}{% endif %}',
+                            name='metrics.html')
+        template({'a': 'abc'})
+        template({'a': 'abc'})
+        self.assertCounter('renders', 'metrics.html', 2)
+        self.assertCounter('render_size', 'metrics.html', 6)
+        self.assertCounter('tag_calls', 'if', 2)
+        self.assertCounter('filter_calls', 'capfirst', 2)
+        histogram = stats.snapshot()['histograms']['render_time']
+        assert histogram['metrics.html']['count'] == 2, (
+                'Render time was not saved')
+
+    def testRenderSize(self):
+        '''Test render size counted in UTF-8 bytes'''
+        template = Template('Привет, {{ name }}', name='size.html')
+        template({'name': 'ä'})
+        self.assertCounter('render_size', 'size.html', 16)
+
+    def testBlocks(self):
+        '''Test blocks are not counted as separate renders'''
+        loader = TemplateLoader()
+        Template('<{% block a %}{% endblock %}>', loader=loader,
+                 name='parent.html')
+        Template('{% extend "parent.html" %}{% block a %}b{% endblock %}',
+                 loader=loader, name='child.html')({})
+        self.assertCounter('renders', 'child.html', 1)
+        self.assertCounter('render_size', 'child.html', 3)
+        renders = stats.snapshot()['counters']['renders']
+        assert list(renders.keys()) == ['child.html'], (
+                'Wrong renders: %s' % renders)
+
+    def testError(self):
+        '''Test render errors counted'''
+        template = Template('{{ a.b.c }}', name='error.html')
+        self.assertRaises(LookupError, template, {'a': {}})
+        self.assertCounter('render_errors', 'error.html', 1)
+        self.assertCounter('renders', 'error.html', None)
+
+    def testLoader(self):
+        '''Test loader lookups and parse time saved'''
+        loader = FSLoader(['tests/templates'])
+        loader.get_template('simple.html')({'name': 'Peter'})
+        self.assertRaises(Exception, loader.get_template, 'unknown.html')
+        self.assertCounter('loader_hits', 'simple.html', 1)
+        self.assertCounter('loader_misses', 'unknown.html', 1)
+        histograms = stats.snapshot()['histograms']
+        assert 'simple.html' in histograms['parse_time'], (
+                'Parse time was not saved')
+
+    def testCallback(self):
+        '''Test callbacks get updates'''
+        updates = []
+        callback = lambda *args: updates.append(args)
+        stats.add_callback(callback)
+        try:
+            Template('text', name='callback.html')({})
+        finally:
+            stats.remove_callback(callback)
+        assert ('counter', 'renders', 'callback.html', 1) in updates, (
+                'Callback was not called: %s' % updates)
+
+    def testThreads(self):
+        '''Test counters updated from concurrent threads'''
+        template = Template('{{ a }}', name='threads.html')
+
+        def render():
+            for _ in range(100):
+                template({'a': 1})
+        threads = [threading.Thread(target=render) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertCounter('renders', 'threads.html', 800)
+
+    def testDisabled(self):
+        '''Test nothing collected when metrics disabled'''
+        stats.enable(False)
+        Template('text', name='disabled.html')({})
+        self.assertCounter('renders', 'disabled.html', None)
+
+
+def test():
+    suite = unittest.TestSuite()
+    suite.addTest(HistogramTestCase('testObserve'))
+    suite.addTest(MetricsTestCase('testRender'))
+    suite.addTest(MetricsTestCase('testRenderSize'))
+    suite.addTest(MetricsTestCase('testBlocks'))
+    suite.addTest(MetricsTestCase('testError'))
+    suite.addTest(MetricsTestCase('testLoader'))
+    suite.addTest(MetricsTestCase('testCallback'))
+    suite.addTest(MetricsTestCase('testThreads'))
+    suite.addTest(MetricsTestCase('testDisabled'))
+    return suite
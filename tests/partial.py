@@ -3,6 +3,7 @@
 import unittest
 
 from lighty.templates import Template
+from lighty.templates.loaders import FSLoader, TemplateLoader
 
 
 class PartialTestCase(unittest.TestCase):
@@ -28,9 +29,161 @@ class PartialTestCase(unittest.TestCase):
                     ('"', result, '" except "', expected, '"', ))
 
 
+class PartialTagsTestCase(unittest.TestCase):
+    '''Test case for partial execution of template tags
+    '''
+
+    def assertPartial(self, template, result, commands):
+        value = template({'user': 'Peter'})
+        assert value == result, 'Wrong partial result: "%s" except "%s"' % (
+                value, result)
+        assert len(template.commands) == commands, (
+                'Wrong number of commands: %d except %d' % (
+                len(template.commands), commands))
+
+    def testStaticIf(self):
+        '''Test if tag with static condition'''
+        template = Template('{% if a %}a {{ user }}{% endif %}' +
+                            '{% if b %}b{% endif %}!')
+        self.assertPartial(template.partial({'a': True, 'b': False}),
+                           'a Peter!', 3)
+
+    def testDynamicIf(self):
+        '''Test if tag with dynamic condition'''
+        template = Template('{% if user %}{{ a }}, {{ user }}{% endif %}')
+        self.assertPartial(template.partial({'a': 'Hello'}), 'Hello, Peter',
+                           1)
+
+    def testUnrollFor(self):
+        '''Test for tag over static sequence'''
+        template = Template('{% for a in items %}{{ a }}{% endfor %}.')
+        self.assertPartial(template.partial({'items': [1, 2, 3]}), '123.', 1)
+
+    def testUnrollForWithDynamic(self):
+        '''Test for tag over static sequence with dynamic block contents'''
+        template = Template('{% for a in items %}{% with user as b %}' +
+                            '{{ a }}{{ b }}{% endwith %}{% endfor %}')
+        part = template.partial({'items': [1, 2]})
+        self.assertPartial(part, '1Peter2Peter', 2)
+
+    def testLoopVariableShadowing(self):
+        '''Test static variable shadowed by loop variable'''
+        template = Template('{% for a in items %}{{ a }}{% endfor %}')
+        part = template.partial({'a': 'static'})
+        result = part({'items': [1, 2]})
+        assert result == '12', 'Wrong result: %s' % result
+
+    def testStaticWith(self):
+        '''Test with tag with static value'''
+        template = Template('{% with a.b as c %}{{ c }}{% endwith %}')
+        self.assertPartial(template.partial({'a': {'b': 'value'}}), 'value',
+                           1)
+
+    def testExplicitStatic(self):
+        '''Test only static variables are executed'''
+        template = Template('{{ a }}{{ user }}')
+        part = template.partial({'a': '1', 'user': 'John'}, static=['a'])
+        self.assertPartial(part, '1Peter', 2)
+
+    def testMissingStatic(self):
+        '''Test errors on static variables resolving are raised'''
+        template = Template('{{ a.b }}')
+        self.assertRaises(AttributeError, template.partial, {'a': 1})
+
+    def testInclude(self):
+        '''Test included template inlining'''
+        template = Template('{% include "simple.html" %}', name="test.html",
+                            loader=FSLoader(['tests/templates']))
+        part = template.partial({'name': 'John'})
+        assert part({}).strip() == 'Hello, John', 'Wrong result: %s' % (
+                part({}), )
+
+    def testKeptCommands(self):
+        '''Test commands kept get the values of static variables'''
+        loader = TemplateLoader()
+        Template('{% spaceless %}<b>{{ a }}</b>{% endspaceless %}' +
+                 '{{ b|random }}', loader=loader, name='kept.html')
+        variant = loader.get_variant('kept.html', {'a': 'A', 'b': ['B']})
+        result = variant({})
+        assert result == '<b>A</b>B', 'Wrong result: %s' % result
+
+    def testLongLoop(self):
+        '''Test loop over static sequence longer than max_unroll'''
+        template = Template('{% for x in xs %}{{ x }}{{ user }}{% endfor %}')
+        part = template.partial({'xs': [1, 2, 3]}, max_unroll=2)
+        result = part({'user': '.'})
+        assert result == '1.2.3.', 'Wrong result: %s' % result
+
+    def testRecursiveInclude(self):
+        '''Test recursive include is executed on render'''
+        loader = FSLoader(['tests/templates'])
+        nodes = [{'name': 'a', 'children': [{'name': 'b', 'children': []}]}]
+        part = loader.get_template('menu.html').partial({})
+        result = ''.join(part({'nodes': nodes}).split())
+        assert result == 'ab', 'Wrong result: %s' % result
+        variant = loader.get_variant('menu.html', {'nodes': nodes})
+        result = ''.join(variant({}).split())
+        assert result == 'ab', 'Wrong variant result: %s' % result
+
+
+class NocacheTestCase(unittest.TestCase):
+    '''Test case for page skeletons with nocache blocks
+    '''
+
+    def testNocache(self):
+        '''Test nocache block is rendered on each execution'''
+        template = Template('{{ title }}{% nocache %}{{ user }}' +
+                            '{% endnocache %}{{ text }}')
+        result = template({'title': 'T', 'user': 'Peter', 'text': '!'})
+        assert result == 'TPeter!', 'Wrong result: %s' % result
+        part = template.partial({'title': 'T', 'user': 'John', 'text': '!'})
+        assert len(part.commands) == 3, 'Wrong commands: %s' % part.commands
+        result = part({'user': 'Peter'})
+        assert result == 'TPeter!', 'Wrong skeleton result: %s' % result
+
+    def testNocacheLoop(self):
+        '''Test nocache block gets the values of unrolled loop'''
+        template = Template('{% for a in items %}{% nocache %}{{ a }}' +
+                            '{{ user }}{% endnocache %}{% endfor %}')
+        part = template.partial({'items': [1, 2]})
+        result = part({'user': 'Peter'})
+        assert result == '1Peter2Peter', 'Wrong result: %s' % result
+
+    def testSkeleton(self):
+        '''Test loader caches the skeletons by key'''
+        loader = TemplateLoader()
+        Template('<h1>{{ title }}</h1>{% nocache %}{{ user }}' +
+                 '{% endnocache %}', loader=loader, name='page.html')
+        first = loader.get_skeleton('page.html', 1, {'title': 'One'})
+        second = loader.get_skeleton('page.html', 1, {'title': 'Two'})
+        assert first is second, 'Skeleton was not cached'
+        assert first.name not in loader.templates, (
+                'Skeleton registered as template')
+        result = first({'user': 'Peter'})
+        assert result == '<h1>One</h1>Peter', 'Wrong result: %s' % result
+        other = loader.get_skeleton('page.html', 2, {'title': 'Two'})
+        result = other({'user': 'John'})
+        assert result == '<h1>Two</h1>John', 'Wrong result: %s' % result
+
+
 def test():
     suite = unittest.TestSuite()
     suite.addTest(PartialTestCase('testPartialName'))
     suite.addTest(PartialTestCase('testPartialCommands'))
     suite.addTest(PartialTestCase('testPartialExecution'))
+    suite.addTest(PartialTagsTestCase('testStaticIf'))
+    suite.addTest(PartialTagsTestCase('testDynamicIf'))
+    suite.addTest(PartialTagsTestCase('testUnrollFor'))
+    suite.addTest(PartialTagsTestCase('testUnrollForWithDynamic'))
+    suite.addTest(PartialTagsTestCase('testLoopVariableShadowing'))
+    suite.addTest(PartialTagsTestCase('testStaticWith'))
+    suite.addTest(PartialTagsTestCase('testExplicitStatic'))
+    suite.addTest(PartialTagsTestCase('testMissingStatic'))
+    suite.addTest(PartialTagsTestCase('testInclude'))
+    suite.addTest(PartialTagsTestCase('testKeptCommands'))
+    suite.addTest(PartialTagsTestCase('testLongLoop'))
+    suite.addTest(PartialTagsTestCase('testRecursiveInclude'))
+    suite.addTest(NocacheTestCase('testNocache'))
+    suite.addTest(NocacheTestCase('testNocacheLoop'))
+    suite.addTest(NocacheTestCase('testSkeleton'))
     return suite
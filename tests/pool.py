@@ -0,0 +1,56 @@
+"""Test cases for the pool of rendering processes
+"""
+from functools import partial
+import unittest
+
+from lighty.templates.loaders import FSLoader
+from lighty.templates.pool import RenderPool
+
+
+class RenderPoolTestCase(unittest.TestCase):
+    """Test case for rendering templates in worker processes
+    """
+
+    def setUp(self):
+        self.pool = RenderPool(partial(FSLoader, ['tests/templates']),
+                               processes=2, max_tasks_per_child=3,
+                               max_pending=2)
+
+    def tearDown(self):
+        self.pool.terminate()
+
+    def testRender(self):
+        '''Test template rendered in worker'''
+        result = self.pool.render('simple.html', {'name': 'Peter'})
+        assert result == 'Hello, Peter\n', 'Wrong result: %s' % result
+
+    def testMap(self):
+        '''Test rendering jobs in order'''
+        names = ['user%d' % i for i in range(20)]
+        result = list(self.pool.map(('simple.html', {'name': name})
+                                    for name in names))
+        assert result == ['Hello, %s\n' % name for name in names], (
+                'Wrong results order: %s' % result)
+
+    def testError(self):
+        '''Test error raised by worker'''
+        self.assertRaises(Exception, self.pool.render, 'unknown.html', {})
+        result = self.pool.render('simple.html', {'name': 'John'})
+        assert result == 'Hello, John\n', 'Pool broken after error'
+
+    def testPicklingError(self):
+        '''Test jobs failed in pool do not hold pending slots'''
+        for _ in range(3):
+            result = self.pool.submit('simple.html', {'name': lambda: 1})
+            self.assertRaises(Exception, result.get, 10)
+        result = self.pool.submit('simple.html', {'name': 'John'}).get(10)
+        assert result == 'Hello, John\n', 'Pool broken after error'
+
+
+def test():
+    suite = unittest.TestSuite()
+    suite.addTest(RenderPoolTestCase('testRender'))
+    suite.addTest(RenderPoolTestCase('testMap'))
+    suite.addTest(RenderPoolTestCase('testError'))
+    suite.addTest(RenderPoolTestCase('testPicklingError'))
+    return suite
@@ -0,0 +1,92 @@
+"""Test cases for source positions tracking
+"""
+import unittest
+
+from lighty.templates.template import Template, TemplateSyntaxError
+from lighty.templates.loaders import FSLoader
+
+
+class PositionsTestCase(unittest.TestCase):
+    """Test case for commands positions
+    """
+
+    def assertPosition(self, result, value):
+        assert result == value, 'Wrong position: %s except %s' % (result,
+                                                                   value)
+
+    def testCommandPosition(self):
+        '''Test position of command'''
+        template = Template('Hello\n  {{ name }}\n{% if a %}{% endif %}',
+                            name='position.html')
+        self.assertPosition(template.position(template.commands[1]),
+                            ('position.html', 2, 3))
+        self.assertPosition(template.position(template.commands[3]),
+                            ('position.html', 3, 1))
+
+    def testParentPosition(self):
+        '''Test position of command from parent template'''
+        template = FSLoader(['tests/templates']).get_template('profile.html')
+        template.prepare()
+        self.assertPosition(template.position(template.commands[0]),
+                            ('base.html', 1, 1))
+
+    def testTextPosition(self):
+        '''Test position of text shared by templates'''
+        first = Template('{{ a }}\n<br>', name='first.html')
+        second = Template('<br>', name='second.html')
+        self.assertPosition(first.position(first.commands[1]),
+                            ('first.html', 1, 8))
+        self.assertPosition(second.position(second.commands[0]),
+                            ('second.html', 1, 1))
+
+    def testSyntaxError(self):
+        '''Test syntax error position'''
+        try:
+            Template('Hello\n{{ a }} {% for a in b %}', name='error.html')
+        except TemplateSyntaxError as error:
+            self.assertPosition((error.name, error.line, error.column),
+                                ('error.html', 2, 9))
+        else:
+            assert False, 'Syntax error was not raised'
+
+    def testUnknownTag(self):
+        '''Test unregistered tag error is LookupError'''
+        try:
+            Template('{% unknown %}', name='error.html')
+        except LookupError as error:
+            assert isinstance(error, TemplateSyntaxError), (
+                    'Wrong error: %r' % error)
+            self.assertPosition((error.name, error.line, error.column),
+                                ('error.html', 1, 1))
+        else:
+            assert False, 'Lookup error was not raised'
+
+    def testExecutionError(self):
+        '''Test position saved for execution errors'''
+        template = Template('Hello\n{{ a.b.c }}', name='error.html')
+        try:
+            template({'a': {}})
+        except LookupError as error:
+            self.assertPosition(error.template_position,
+                                ('error.html', 2, 1))
+        else:
+            assert False, 'Error was not raised'
+
+    def testDependenciesLocations(self):
+        '''Test variables locations in dependencies report'''
+        template = Template('{{ a }}\n{% if a %}{{ b|upper }}{% endif %}')
+        locations = template.dependencies().locations
+        self.assertPosition(sorted(locations['a']), [(1, 1), (2, 1)])
+        self.assertPosition(locations['b'], [(2, 11)])
+
+
+def test():
+    suite = unittest.TestSuite()
+    suite.addTest(PositionsTestCase('testCommandPosition'))
+    suite.addTest(PositionsTestCase('testParentPosition'))
+    suite.addTest(PositionsTestCase('testTextPosition'))
+    suite.addTest(PositionsTestCase('testSyntaxError'))
+    suite.addTest(PositionsTestCase('testUnknownTag'))
+    suite.addTest(PositionsTestCase('testExecutionError'))
+    suite.addTest(PositionsTestCase('testDependenciesLocations'))
+    return suite
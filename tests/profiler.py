@@ -0,0 +1,69 @@
+"""Test cases for template profiler
+"""
+import unittest
+
+from lighty.templates import Template
+from lighty.templates.loaders import FSLoader
+from lighty.templates.profiler import Profiler
+
+
+class ProfilerTestCase(unittest.TestCase):
+    """Test case for template profiler
+    """
+
+    def setUp(self):
+        self.loader = FSLoader(['tests/templates'])
+        self.template = Template('{% for a in items %}{{ a|capfirst }}' +
+                                 '{% include "simple.html" %}{% endfor %}',
+                                 name='profiled.html', loader=self.loader)
+        self.context = {'items': ['a', 'b', 'c'], 'name': 'John'}
+        self.profiler = Profiler()
+
+    def testResult(self):
+        '''Test profiled execution result'''
+        result = self.template.execute(self.context, profiler=self.profiler)
+        right = self.template.execute(self.context)
+        assert result == right, 'Wrong profiled result: %s' % result
+
+    def testCalls(self):
+        '''Test number of calls'''
+        self.template.execute(self.context, profiler=self.profiler)
+        calls = dict([(frame[2:], stats[0])
+                      for frame, stats in self.profiler.stats.items()])
+        assert calls[('tag', 'for')] == 1, 'Wrong number of loops'
+        assert calls[('filter', 'capfirst')] == 3, 'Wrong number of filters'
+        assert calls[('variable', 'name')] == 3, (
+                'Included template was not profiled')
+
+    def testCollapsed(self):
+        '''Test collapsed stacks output'''
+        self.template.execute(self.context, profiler=self.profiler)
+        stacks = [line.rsplit(' ', 1)[0]
+                  for line in self.profiler.collapsed().split('\n')]
+        stack = 'profiled.html;profiled.html:1 tag for;profiled.html:1 ' + \
+                'tag include;simple.html;simple.html:1 variable name'
+        assert stack in stacks, 'Stack not found in: %s' % stacks
+
+    def testReport(self):
+        '''Test hot spots report'''
+        self.template.execute(self.context, profiler=self.profiler)
+        lines = self.profiler.report(limit=3).split('\n')
+        assert len(lines) == 4, 'Wrong report length: %s' % lines
+
+    def testRecursiveInclude(self):
+        '''Test template including itself is profiled'''
+        template = FSLoader(['tests/templates']).get_template('menu.html')
+        nodes = [{'name': 'a', 'children': [{'name': 'b', 'children': []}]}]
+        result = template.execute({'nodes': nodes}, profiler=self.profiler)
+        assert result == template({'nodes': nodes}), (
+                'Wrong profiled result: %s' % result)
+
+
+def test():
+    suite = unittest.TestSuite()
+    suite.addTest(ProfilerTestCase('testResult'))
+    suite.addTest(ProfilerTestCase('testCalls'))
+    suite.addTest(ProfilerTestCase('testCollapsed'))
+    suite.addTest(ProfilerTestCase('testReport'))
+    suite.addTest(ProfilerTestCase('testRecursiveInclude'))
+    return suite
@@ -0,0 +1,90 @@
+"""Test cases for renders capture and replay
+"""
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from lighty.templates.loaders import TemplateLoader
+from lighty.templates.replay import load_records, recorder, replay
+from lighty.templates.template import Template
+
+
+class ReplayTestCase(unittest.TestCase):
+    """Test case for recorder and replay
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'renders.capture')
+        self.loader = TemplateLoader()
+        Template('<b>{{ name }}</b>', loader=self.loader, name='child.html')
+        Template('{{ title }}{% include "child.html" %}', loader=self.loader,
+                 name='page.html')
+
+    def tearDown(self):
+        recorder.stop()
+        shutil.rmtree(self.directory)
+
+    def testRecord(self):
+        '''Test renders are recorded into file'''
+        page = self.loader.get_template('page.html')
+        recorder.start(self.path)
+        page({'title': 'A', 'name': 'B'})
+        page({'title': 'C', 'name': 'D', 'skip': lambda: None})
+        recorder.stop()
+        page({'title': 'E', 'name': 'F'})
+        records = list(load_records(self.path))
+        assert records == [('page.html', {'title': 'A', 'name': 'B'},
+                            'A<b>B</b>')], 'Wrong records: %s' % records
+        assert recorder.skipped == 1, 'Unpicklable context was not skipped'
+
+    def testMaxRecords(self):
+        '''Test recording stops after max records'''
+        page = self.loader.get_template('page.html')
+        recorder.start(self.path, max_records=2)
+        for index in range(4):
+            page({'title': index, 'name': ''})
+        assert not recorder.enabled, 'Recorder was not stopped'
+        records = list(load_records(self.path))
+        assert len(records) == 2, 'Wrong records: %s' % records
+
+    def testSampledRenders(self):
+        '''Test only outermost renders are sampled'''
+        page = self.loader.get_template('page.html')
+        random.seed(1)
+        recorder.start(self.path, rate=0.5)
+        for index in range(20):
+            page({'title': index, 'name': ''})
+        recorder.stop()
+        names = set([name for name, _, _ in load_records(self.path)])
+        assert names == set(['page.html']), 'Wrong records: %s' % names
+
+    def testReplay(self):
+        '''Test replay compares results with captured'''
+        page = self.loader.get_template('page.html')
+        recorder.start(self.path)
+        page({'title': 'A', 'name': 'B'})
+        page({'title': 'C', 'name': 'D'})
+        recorder.stop()
+        report = replay(self.loader, self.path, repeat=2, memory=True)
+        summary = report.templates['page.html'].summary()
+        assert summary['renders'] == 4, 'Wrong summary: %s' % summary
+        assert report.mismatches == [], 'Wrong mismatches: %s' % (
+                report.mismatches)
+        loader = TemplateLoader()
+        Template('{{ title }}', loader=loader, name='page.html')
+        report = replay(loader, self.path)
+        assert report.mismatches == [0, 1], 'Wrong mismatches: %s' % (
+                report.mismatches)
+        assert 'page.html' in report.format(), 'Wrong report'
+
+
+def test():
+    suite = unittest.TestSuite()
+    suite.addTest(ReplayTestCase('testRecord'))
+    suite.addTest(ReplayTestCase('testMaxRecords'))
+    suite.addTest(ReplayTestCase('testSampledRenders'))
+    suite.addTest(ReplayTestCase('testReplay'))
+    return suite
@@ -0,0 +1,69 @@
+"""Test cases for rendering templates from many threads
+"""
+import threading
+import unittest
+
+from lighty.templates.loaders import FSLoader
+from lighty.templates.template import Template
+
+
+class ThreadsTestCase(unittest.TestCase):
+    """Test case for concurrent template rendering. It's useful on CPython
+    built without GIL
+    """
+    threads = 32
+    renders = 50
+
+    def render(self, func):
+        '''Execute function from many threads at once and get the results
+        '''
+        barrier = threading.Event()
+        results = [None] * self.threads
+
+        def run(index):
+            barrier.wait()
+            try:
+                results[index] = [func() for _ in range(self.renders)]
+            except Exception as error:
+                results[index] = error
+        threads = [threading.Thread(target=run, args=(index, ))
+                   for index in range(self.threads)]
+        for thread in threads:
+            thread.start()
+        barrier.set()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def testLazyTemplate(self):
+        '''Test lazy templates prepared once from many threads'''
+        loader = FSLoader(['tests/templates'])
+        template = loader.get_template('profile.html')
+        context = {'user': {'name': 'peter'}, 'name': 'John',
+                   'items': [{'visible': True, 'title': 'a'},
+                             {'visible': False, 'title': 'b'}]}
+        expected = FSLoader(['tests/templates']).get_template(
+                'profile.html')(context)
+        for result in self.render(lambda: template(context)):
+            assert result == [expected] * self.renders, (
+                    'Wrong result: %s' % result)
+        assert 'blocks-content' not in loader.templates, (
+                'Block template registered in loader')
+
+    def testSharedContext(self):
+        '''Test the same context used from many threads'''
+        template = Template('{% for a in items %}{% with b as c %}{{ a }}' +
+                            '{{ c }}{% endwith %}{% endfor %}{{ a }}')
+        context = {'items': [1, 2, 3], 'a': 'x', 'b': 'y'}
+        for result in self.render(lambda: template(context)):
+            assert result == ['1y2y3yx'] * self.renders, (
+                    'Wrong result: %s' % result)
+        assert context == {'items': [1, 2, 3], 'a': 'x', 'b': 'y'}, (
+                'Context changed: %s' % context)
+
+
+def test():
+    suite = unittest.TestSuite()
+    suite.addTest(ThreadsTestCase('testLazyTemplate'))
+    suite.addTest(ThreadsTestCase('testSharedContext'))
+    return suite
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""Test cases for writing encoded template result
+"""
+import io
+import unittest
+
+from lighty.templates.loaders import FSLoader
+from lighty.templates.template import Template
+
+
+class RenderToTestCase(unittest.TestCase):
+    """Test case for Template.render_to
+    """
+
+    def testBytearray(self):
+        '''Test writing into bytearray'''
+        template = Template(u'Привет, {{ name }}!')
+        result = bytearray()
+        template.render_to(result, {'name': u'Мир'})
+        expected = u'Привет, Мир!'.encode('utf-8')
+        assert result == expected, 'Wrong result: %s' % result
+
+    def testFile(self):
+        '''Test writing into file with encoding specified'''
+        template = Template(u'{% for a in items %}ä{{ a }}{% endfor %}')
+        result = io.BytesIO()
+        template.render_to(result, {'items': [1, 2]}, 'latin-1')
+        expected = u'ä1ä2'.encode('latin-1')
+        assert result.getvalue() == expected, 'Wrong result: %s' % (
+                result.getvalue())
+
+    def testExtend(self):
+        '''Test writing result of template with blocks'''
+        loader = FSLoader(['tests/templates'])
+        template = loader.get_template('index.html')
+        result = bytearray()
+        template.render_to(result)
+        expected = template.execute().encode('utf-8')
+        assert result == expected, 'Wrong result: %s' % result
+        base = bytearray()
+        loader.get_template('base.html').render_to(base)
+        assert base == loader.get_template('base.html')().encode('utf-8'), (
+                'Parent template result changed')
+
+
+def test():
+    suite = unittest.TestSuite()
+    suite.addTest(RenderToTestCase('testBytearray'))
+    suite.addTest(RenderToTestCase('testFile'))
+    suite.addTest(RenderToTestCase('testExtend'))
+    return suite